@@ -1,16 +1,44 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from datetime import timedelta
 from app.core.config import settings
 from app.core.security import create_access_token
+from app.core.rate_limit import TokenBucketLimiter
 from app.models.user import UserLoginRequest, LoginResponse, UserResponse
 from app.services.user_service import verify_user_credentials
+from app.core.request_logging import TimedRoute
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=TimedRoute)
+
+login_ip_limiter = TokenBucketLimiter(
+    capacity=settings.login_rate_limit_ip_capacity,
+    refill_per_minute=settings.login_rate_limit_ip_per_minute,
+    max_keys=settings.login_rate_limit_max_keys,
+)
+login_email_limiter = TokenBucketLimiter(
+    capacity=settings.login_rate_limit_email_capacity,
+    refill_per_minute=settings.login_rate_limit_email_per_minute,
+    max_keys=settings.login_rate_limit_max_keys,
+)
+
+
+def check_login_rate_limit(client_ip: str, email: str) -> None:
+    """Tolak percobaan login yang melebihi limit sebelum query DB / bcrypt"""
+    for limiter, key in ((login_ip_limiter, client_ip), (login_email_limiter, email.lower())):
+        allowed, retry_after = limiter.consume(key)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts. Please try again later.",
+                headers={"Retry-After": str(retry_after)},
+            )
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(login_data: UserLoginRequest):
+async def login(login_data: UserLoginRequest, request: Request):
     """Login user dan mendapatkan JWT token"""
+    client_ip = request.client.host if request.client else "unknown"
+    check_login_rate_limit(client_ip, login_data.email)
+
     user = await verify_user_credentials(login_data.email, login_data.password)
     
     if not user:
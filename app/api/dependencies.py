@@ -1,5 +1,8 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Query, status
+from typing import Optional
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.config import settings
+from app.core.request_logging import span
 from app.core.security import decode_access_token
 from app.services.user_service import get_user_by_id
 
@@ -10,7 +13,11 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
     """Dependency untuk mendapatkan current user dari JWT token"""
-    token = credentials.credentials
+    with span("auth"):
+        return await _authenticate(credentials.credentials)
+
+
+async def _authenticate(token: str) -> dict:
     payload = decode_access_token(token)
     
     if payload is None:
@@ -37,3 +44,40 @@ async def get_current_user(
         )
     
     return user
+
+
+async def get_batch_ids(
+    ids: Optional[list[str]] = Query(
+        None, description="Daftar ID (ids=a&ids=b atau ids=a,b) untuk diambil sekaligus"
+    )
+) -> Optional[list[str]]:
+    """Dependency untuk parsing query ids pada endpoint batch"""
+    if not ids:
+        return None
+    
+    parsed = [item.strip() for value in ids for item in value.split(",") if item.strip()]
+    if len(parsed) > settings.batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many ids. Maximum: {settings.batch_max_ids}",
+        )
+    return parsed
+
+
+async def get_if_match_version(
+    if_match: Optional[str] = Header(None, description='Version document dari ETag, mis. "3"')
+) -> Optional[int]:
+    """Dependency untuk parsing header If-Match menjadi version yang diharapkan"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match header. Expected a version ETag, e.g. \"3\"",
+        )
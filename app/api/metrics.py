@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from app.api.dependencies import get_current_user
+from app.core.compression import compression_stats
+from app.api.auth import login_ip_limiter, login_email_limiter
+from app.db.connection import pool_admission
+from app.services.product_service import product_cache
+from app.services.user_service import user_cache
+from app.core.request_logging import TimedRoute
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"], route_class=TimedRoute)
+
+
+@router.get("")
+async def get_metrics(current_user: dict = Depends(get_current_user)):
+    """Mengambil metrik runtime service"""
+    return {
+        "compression": compression_stats.snapshot(),
+        "login_rate_limit": {
+            "ip": login_ip_limiter.snapshot(),
+            "email": login_email_limiter.snapshot(),
+        },
+        "lookup_cache": {
+            "products": product_cache.snapshot(),
+            "users": user_cache.snapshot(),
+        },
+        "db_admission": pool_admission.snapshot(),
+    }
@@ -1,59 +1,105 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response, UploadFile, File
 from typing import Optional, Union
 from app.models.product import (
     ProductCreateRequest,
     ProductUpdateRequest,
     ProductResponse,
-    ProductListResponse
+    ProductListResponse,
+    CategoryStatsListResponse
 )
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_batch_ids, get_if_match_version
 from app.services.product_service import (
     create_product,
     get_product_by_id,
+    get_products_by_ids,
     get_all_products,
     update_product,
     delete_product
 )
-from app.utils.file_upload import save_uploaded_file
-import json
-from pydantic import ValidationError
-from app.utils.form_data import as_form_product_create, as_form_product_update
+from app.services.count_service import TotalMode
+from app.services.stats_service import get_category_stats, rebuild_category_stats
+from app.services.upload_service import save_uploaded_file
+from app.utils.helpers import etag_for_version
+from app.utils.form_data import (
+    PRODUCT_SERVER_FIELDS,
+    product_create_payload,
+    product_update_payload,
+    get_form_file,
+    payload_openapi,
+)
+from app.core.request_logging import TimedRoute
 
-router = APIRouter(prefix="/products", tags=["Products"])
+router = APIRouter(prefix="/products", tags=["Products"], route_class=TimedRoute)
 
 
 @router.get("", response_model=ProductListResponse)
 async def get_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    category: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    total_mode: TotalMode = Query("exact", description="exact | estimated | cached"),
+    ids: Optional[list[str]] = Depends(get_batch_ids),
     current_user: dict = Depends(get_current_user)
 ):
-    """Mengambil semua products (dengan pagination)"""
-    products, total = await get_all_products(skip=skip, limit=limit)
+    """Mengambil semua products (dengan pagination), atau products tertentu via ids"""
+    if ids is not None:
+        products, missing_ids = await get_products_by_ids(ids)
+        return ProductListResponse(products=products, total=len(products), missing_ids=missing_ids)
+
+    products, total = await get_all_products(
+        skip=skip, limit=limit, category=category, status=status_filter, total_mode=total_mode
+    )
     return ProductListResponse(products=products, total=total)
 
 
+@router.get("/stats/categories", response_model=CategoryStatsListResponse)
+async def get_product_category_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Statistik product per kategori (jumlah, nilai stok, rata-rata harga & rating)"""
+    categories = await get_category_stats()
+    return CategoryStatsListResponse(categories=categories)
+
+
+@router.post("/stats/rebuild", response_model=CategoryStatsListResponse)
+async def rebuild_product_category_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Rebuild penuh statistik kategori dari collection products"""
+    categories = await rebuild_category_stats()
+    return CategoryStatsListResponse(categories=categories)
+
+
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: str,
+    response: Response,
     current_user: dict = Depends(get_current_user)
 ):
-    """Mengambil product berdasarkan ID"""
+    """Mengambil product berdasarkan ID (header ETag berisi version untuk If-Match)"""
     product = await get_product_by_id(product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    response.headers["ETag"] = etag_for_version(product.version)
     return product
 
 
-@router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=ProductResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=payload_openapi(ProductCreateRequest, PRODUCT_SERVER_FIELDS),
+)
 async def create_product_route(
-    file: UploadFile = File(None),
-    product_data: ProductCreateRequest = Depends(as_form_product_create), 
+    product_data: ProductCreateRequest = Depends(product_create_payload),
+    file: Optional[UploadFile] = Depends(get_form_file),
     current_user: dict = Depends(get_current_user)  
 ):
+    """Membuat product baru (body JSON, atau multipart dengan file gambar opsional)"""
     if file:
         file_url = await save_uploaded_file(file, "products")
         product_data.image_url = file_url
@@ -62,20 +108,49 @@ async def create_product_route(
     return product
 
 
-@router.put("/{product_id}", response_model=ProductResponse)
+@router.put(
+    "/{product_id}",
+    response_model=ProductResponse,
+    openapi_extra=payload_openapi(ProductUpdateRequest, PRODUCT_SERVER_FIELDS),
+)
 async def update_product_route(
     product_id: str,
-    file: UploadFile = File(None), 
-    product_data: ProductUpdateRequest = Depends(as_form_product_update),
+    response: Response,
+    product_data: ProductUpdateRequest = Depends(product_update_payload),
+    file: Optional[UploadFile] = Depends(get_form_file),
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: dict = Depends(get_current_user)
 ):
-    """Update product"""
+    """Update product (kirim header If-Match untuk mencegah lost update -> 412 jika version berbeda)"""
     
-    if file and file.filename:
+    if file:
         file_url = await save_uploaded_file(file, "products")
         product_data.image_url = file_url
 
-    updated_product = await update_product(product_id, product_data)
+    return await _apply_product_update(product_id, product_data, expected_version, response)
+
+
+@router.post("/{product_id}/image", response_model=ProductResponse)
+async def upload_product_image_route(
+    product_id: str,
+    response: Response,
+    file: UploadFile = File(...),
+    expected_version: Optional[int] = Depends(get_if_match_version),
+    current_user: dict = Depends(get_current_user)
+):
+    """Upload / ganti gambar product (multipart), terpisah dari update data JSON"""
+    file_url = await save_uploaded_file(file, "products")
+    product_data = ProductUpdateRequest(image_url=file_url)
+    return await _apply_product_update(product_id, product_data, expected_version, response)
+
+
+async def _apply_product_update(
+    product_id: str,
+    product_data: ProductUpdateRequest,
+    expected_version: Optional[int],
+    response: Response,
+):
+    updated_product = await update_product(product_id, product_data, expected_version)
     
     if not updated_product:
         raise HTTPException(
@@ -83,6 +158,7 @@ async def update_product_route(
             detail="Product not found"
         )
         
+    response.headers["ETag"] = etag_for_version(updated_product.get("version", 0))
     return updated_product
 
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response, UploadFile, File
 from typing import Optional
 from app.models.user import (
     UserCreateRequest,
@@ -6,26 +6,41 @@ from app.models.user import (
     UserResponse,
     UserListResponse
 )
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_batch_ids, get_if_match_version
 from app.services.user_service import (
     create_user,
     get_user_by_id,
+    get_users_by_ids,
     get_all_users,
     update_user,
     delete_user
 )
-from app.utils.file_upload import save_uploaded_file
-from app.utils.form_data import as_form_user_create, as_form_user_update
+from app.services.count_service import TotalMode
+from app.services.upload_service import save_uploaded_file
+from app.utils.helpers import etag_for_version
+from app.utils.form_data import (
+    USER_SERVER_FIELDS,
+    user_create_payload,
+    user_update_payload,
+    get_form_file,
+    payload_openapi,
+)
+from app.core.request_logging import TimedRoute
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=TimedRoute)
 
 
-@router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=payload_openapi(UserCreateRequest, USER_SERVER_FIELDS),
+)
 async def create_user_route(
-    file: UploadFile = File(None),
-    user_data: UserCreateRequest = Depends(as_form_user_create)
+    user_data: UserCreateRequest = Depends(user_create_payload),
+    file: Optional[UploadFile] = Depends(get_form_file)
 ):
-    """Membuat user baru"""
+    """Membuat user baru (body JSON, atau multipart dengan foto profil opsional)"""
     
     if file:
         file_url = await save_uploaded_file(file, "users")
@@ -38,49 +53,88 @@ async def create_user_route(
 async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    total_mode: TotalMode = Query("exact", description="exact | estimated | cached"),
+    ids: Optional[list[str]] = Depends(get_batch_ids),
     current_user: dict = Depends(get_current_user)
 ):
-    """Mengambil semua users (dengan pagination)"""
-    users, total = await get_all_users(skip=skip, limit=limit)
+    """Mengambil semua users (dengan pagination), atau users tertentu via ids"""
+    if ids is not None:
+        users, missing_ids = await get_users_by_ids(ids)
+        return UserListResponse(users=users, total=len(users), missing_ids=missing_ids)
+
+    users, total = await get_all_users(skip=skip, limit=limit, status=status_filter, total_mode=total_mode)
     return UserListResponse(users=users, total=total)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
+    response: Response,
     current_user: dict = Depends(get_current_user)
 ):
-    """Mengambil user berdasarkan ID"""
+    """Mengambil user berdasarkan ID (header ETag berisi version untuk If-Match)"""
     user = await get_user_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    response.headers["ETag"] = etag_for_version(user.version)
     return user
 
 
 
-@router.put("/{user_id}", response_model=UserResponse)
+@router.put(
+    "/{user_id}",
+    response_model=UserResponse,
+    openapi_extra=payload_openapi(UserUpdateRequest, USER_SERVER_FIELDS),
+)
 async def update_user_route(
     user_id: str,
-    file: UploadFile = File(None),
-    user_data: UserUpdateRequest = Depends(as_form_user_update),
+    response: Response,
+    user_data: UserUpdateRequest = Depends(user_update_payload),
+    file: Optional[UploadFile] = Depends(get_form_file),
+    expected_version: Optional[int] = Depends(get_if_match_version),
     current_user: dict = Depends(get_current_user)
 ):
-    """Update user"""
+    """Update user (kirim header If-Match untuk mencegah lost update -> 412 jika version berbeda)"""
     
     if file:
         file_url = await save_uploaded_file(file, "users")
         user_data.profile_img = file_url
 
-    updated_user = await update_user(user_id, user_data)
+    return await _apply_user_update(user_id, user_data, expected_version, response)
+
+
+@router.post("/{user_id}/profile-image", response_model=UserResponse)
+async def upload_profile_image_route(
+    user_id: str,
+    response: Response,
+    file: UploadFile = File(...),
+    expected_version: Optional[int] = Depends(get_if_match_version),
+    current_user: dict = Depends(get_current_user)
+):
+    """Upload / ganti foto profil (multipart), terpisah dari update data JSON"""
+    file_url = await save_uploaded_file(file, "users")
+    user_data = UserUpdateRequest(profile_img=file_url)
+    return await _apply_user_update(user_id, user_data, expected_version, response)
+
+
+async def _apply_user_update(
+    user_id: str,
+    user_data: UserUpdateRequest,
+    expected_version: Optional[int],
+    response: Response,
+):
+    updated_user = await update_user(user_id, user_data, expected_version)
     
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    response.headers["ETag"] = etag_for_version(updated_user.version)
     return updated_user
 
 
@@ -0,0 +1,56 @@
+"""
+Kalibrasi cost bcrypt untuk host ini.
+
+Penggunaan:
+    python -m app.core.bcrypt_calibration --target-ms 250
+
+Mengukur waktu hash untuk setiap jumlah rounds lalu menyarankan nilai BCRYPT_ROUNDS
+tertinggi yang waktu hash-nya masih di bawah target latency.
+"""
+import argparse
+import statistics
+import time
+from passlib.hash import bcrypt
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+
+
+def measure_hash_ms(rounds: int, samples: int = 3) -> float:
+    """Median waktu hash (ms) untuk jumlah rounds tertentu"""
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int = 3) -> int:
+    """Rounds tertinggi dengan waktu hash <= target_ms"""
+    # Warm-up: hash pertama ikut menghitung waktu load backend bcrypt
+    measure_hash_ms(MIN_ROUNDS, samples=1)
+
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = measure_hash_ms(rounds, samples)
+        print(f"rounds={rounds:2d}  {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kalibrasi cost bcrypt untuk target latency hash")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Target waktu hash per password (ms)")
+    parser.add_argument("--samples", type=int, default=3, help="Jumlah pengukuran per rounds")
+    args = parser.parse_args()
+
+    rounds = calibrate(args.target_ms, args.samples)
+    print(f"\nBCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
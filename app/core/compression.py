@@ -0,0 +1,148 @@
+import gzip
+import zlib
+from dataclasses import dataclass, asdict
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Encoding yang didukung, urut berdasarkan preferensi server
+SUPPORTED_ENCODINGS = ("gzip", "deflate")
+
+# Content-Type yang sudah terkompresi tidak perlu dikompresi ulang
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+@dataclass
+class CompressionStats:
+    responses_compressed: int = 0
+    responses_skipped: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    offloaded: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    def snapshot(self) -> dict:
+        data = asdict(self)
+        data["bytes_saved"] = self.bytes_saved
+        data["ratio"] = round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None
+        return data
+
+
+compression_stats = CompressionStats()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pilih encoding dari header Accept-Encoding (menghormati q-value)"""
+    qualities = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[token.strip()] = q
+
+    wildcard = qualities.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = qualities.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_body(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    return zlib.compress(body, level)
+
+
+class CompressionMiddleware:
+    """
+    Kompresi response berdasarkan Accept-Encoding.
+    Response kecil (< minimum_size) dan response streaming dilewatkan apa adanya;
+    body yang lebih besar dari offload_size dikompresi di threadpool agar event loop tidak tertahan.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compresslevel: int = 6,
+        offload_size: int = 256 * 1024,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.offload_size = offload_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        initial_message: Message = {}
+        started = False
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal initial_message, started, passthrough
+
+            if message["type"] == "http.response.start":
+                initial_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES)
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if passthrough or started:
+                if not started:
+                    started = True
+                    await send(initial_message)
+                await send(message)
+                return
+
+            started = True
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Response streaming atau terlalu kecil: kirim tanpa kompresi
+                compression_stats.responses_skipped += 1
+                await send(initial_message)
+                await send(message)
+                return
+
+            if len(body) >= self.offload_size:
+                compression_stats.offloaded += 1
+                compressed = await run_in_threadpool(compress_body, body, encoding, self.compresslevel)
+            else:
+                compressed = compress_body(body, encoding, self.compresslevel)
+
+            compression_stats.responses_compressed += 1
+            compression_stats.bytes_in += len(body)
+            compression_stats.bytes_out += len(compressed)
+
+            headers = MutableHeaders(raw=initial_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+
+            await send(initial_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
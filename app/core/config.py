@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Literal
 
 
 class Settings(BaseSettings):
@@ -7,6 +7,55 @@ class Settings(BaseSettings):
     jwt_secret_key: str
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
+
+    log_level: str = "INFO"
+
+    # Cost bcrypt (log2 rounds); pilih nilainya dengan: python -m app.core.bcrypt_calibration
+    bcrypt_rounds: int = 12
+
+    # Storage backend: "mongo" (Motor) atau "memory" (in-process, untuk test/benchmark)
+    storage_backend: Literal["mongo", "memory"] = "mongo"
+    mongodb_max_pool_size: int = 100
+
+    # Deadline request (ms) + override per prefix path, mis. {"/api/v1/products": 2000}; 0 = tanpa deadline
+    request_timeout_ms: int = 5000
+    route_timeouts_ms: dict[str, int] = {}
+
+    # Response compression
+    compression_minimum_size: int = 1024
+    compression_level: int = 6
+    compression_offload_size: int = 256 * 1024
+
+    # Rate limiting login (token bucket per IP dan per email)
+    login_rate_limit_ip_capacity: int = 20
+    login_rate_limit_ip_per_minute: float = 10
+    login_rate_limit_email_capacity: int = 5
+    login_rate_limit_email_per_minute: float = 5
+    login_rate_limit_max_keys: int = 10000
+
+    # Cache lookup by ID (product & user) + single-flight
+    lookup_cache_ttl_seconds: float = 2.0
+    lookup_cache_max_entries: int = 10000
+
+    # Variant gambar (thumb/medium + webp) yang di-generate di process pool
+    image_variants_enabled: bool = True
+    image_variant_webp: bool = True
+    image_variant_workers: int = 2
+
+    # Jumlah maksimum ID per request batch (GET /products?ids=..., GET /users?ids=...)
+    batch_max_ids: int = 100
+
+    # Total untuk endpoint list (total_mode=cached)
+    count_reconcile_seconds: float = 60.0
+    count_filter_ttl_seconds: float = 5.0
+
+    # Profiling request on-demand (pyinstrument); middleware tidak dipasang jika nonaktif
+    profiling_enabled: bool = False
+    profiling_token: str = ""
+    profiling_sample_rate: float = 0.0
+    profiling_dir: str = "profiles"
+    profiling_max_files: int = 100
+    profiling_interval_ms: float = 1.0
     
     class Config:
         env_file = ".env"
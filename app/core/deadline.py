@@ -0,0 +1,115 @@
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Deadline request aktif (time.monotonic()), None berarti tanpa batas waktu
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Sisa waktu request tidak cukup untuk menjalankan query"""
+
+
+def remaining_ms() -> Optional[int]:
+    """Sisa budget request dalam milidetik (None jika tidak ada deadline)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return int((deadline - time.monotonic()) * 1000)
+
+
+def end_deadline() -> None:
+    """
+    Dipanggil service setelah write utama request (insert/update/delete document): sisa request
+    (statistik, refcount upload) berjalan tanpa load shedding/maxTimeMS, agar write yang sudah
+    commit tidak dilaporkan 503. Juga dipakai sebelum cleanup yang harus tetap berjalan.
+    """
+    _deadline.set(None)
+
+
+class DeadlineMiddleware:
+    """
+    Set deadline per request. Timeout diambil dari route_timeouts_ms
+    (prefix path terpanjang yang cocok), selain itu default_timeout_ms; 0 = tanpa deadline.
+    """
+
+    def __init__(self, app: ASGIApp, default_timeout_ms: int, route_timeouts_ms: Optional[dict[str, int]] = None):
+        self.app = app
+        self.default_timeout_ms = default_timeout_ms
+        # Urut dari prefix terpanjang agar route yang lebih spesifik menang
+        self.route_timeouts = sorted((route_timeouts_ms or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def timeout_for(self, path: str) -> int:
+        for prefix, timeout_ms in self.route_timeouts:
+            if path.startswith(prefix):
+                return timeout_ms
+        return self.default_timeout_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout_ms = self.timeout_for(scope["path"])
+        token = _deadline.set(time.monotonic() + timeout_ms / 1000 if timeout_ms > 0 else None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+
+
+class PoolAdmission:
+    """
+    Admission control di depan connection pool MongoDB.
+    Estimasi waktu tunggu = antrian di atas pool_size / pool_size * rata-rata latency query (EWMA).
+    Query ditolak lebih awal (load shedding) jika estimasi melebihi sisa budget request.
+    """
+
+    def __init__(self, pool_size: int, alpha: float = 0.2):
+        self.pool_size = max(pool_size, 1)
+        self.alpha = alpha
+        self.inflight = 0
+        self.ewma_ms = 0.0
+        self.admitted = 0
+        self.shed = 0
+        self.expired = 0
+
+    def projected_wait_ms(self) -> float:
+        queued = self.inflight + 1 - self.pool_size
+        if queued <= 0:
+            return 0.0
+        return queued / self.pool_size * self.ewma_ms
+
+    @asynccontextmanager
+    async def slot(self):
+        budget = remaining_ms()
+        if budget is not None:
+            if budget <= 0:
+                self.expired += 1
+                raise DeadlineExceeded("Request deadline exceeded")
+            if self.projected_wait_ms() > budget:
+                self.shed += 1
+                raise DeadlineExceeded("Database overloaded, request shed")
+
+        self.admitted += 1
+        self.inflight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.ewma_ms += self.alpha * (elapsed_ms - self.ewma_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "inflight": self.inflight,
+            "ewma_ms": round(self.ewma_ms, 2),
+            "projected_wait_ms": round(self.projected_wait_ms(), 2),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "expired": self.expired,
+        }
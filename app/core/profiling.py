@@ -0,0 +1,100 @@
+import hmac
+import logging
+import os
+import random
+import re
+import time
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.request_logging import get_request_id
+
+logger = logging.getLogger("app.profiling")
+
+PROFILE_HEADER = "x-profile"
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", value).strip("-")
+
+
+class ProfilingMiddleware:
+    """
+    Profiling on-demand per request dengan pyinstrument (sampling stack, overhead rendah).
+    Request diprofile jika header X-Profile berisi token yang valid, atau terpilih oleh sample_rate.
+    Hasil (HTML) disimpan di output_dir, hanya max_files profile terbaru yang dipertahankan.
+
+    async_mode="enabled": waktu await (query Motor, bcrypt di threadpool) dihitung pada frame
+    yang menunggu, sehingga terlihat di stack bersama validasi Pydantic dan kode endpoint.
+    Hanya satu profile berjalan bersamaan; request lain saat itu dilewati.
+
+    Middleware ini hanya dipasang jika profiling_enabled, sehingga tidak ada biaya saat nonaktif.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        output_dir: str,
+        token: str = "",
+        sample_rate: float = 0.0,
+        max_files: int = 100,
+        interval_ms: float = 1.0,
+    ):
+        # Import di sini: pyinstrument hanya dibutuhkan jika profiling diaktifkan
+        from pyinstrument import Profiler
+
+        self.app = app
+        self.profiler_class = Profiler
+        self.output_dir = Path(output_dir)
+        self.token = token
+        self.sample_rate = sample_rate
+        self.max_files = max(max_files, 1)
+        self.interval = interval_ms / 1000
+        self.active = False
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def should_profile(self, scope: Scope) -> bool:
+        if self.token:
+            header = Headers(scope=scope).get(PROFILE_HEADER)
+            if header and hmac.compare_digest(header.encode(), self.token.encode()):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.active or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self.active = True
+        profiler = self.profiler_class(interval=self.interval, async_mode="enabled")
+        started_at = time.time()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            self.active = False
+            # Render + tulis file setelah response terkirim, di luar event loop
+            try:
+                await run_in_threadpool(self.save, profiler, scope, started_at)
+            except Exception:
+                logger.exception("Failed to save request profile")
+
+    def save(self, profiler, scope: Scope, started_at: float) -> None:
+        slug = _safe_name(scope["path"])[:80] or "root"
+        timestamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(started_at))
+        # Request ID (bisa dari header client) di nama file agar profile bisa dicocokkan dengan log request
+        request_id = _safe_name(get_request_id() or "") or f"{int(started_at * 1000) % 1000:03d}"
+        filename = f"{timestamp}_{scope['method']}_{slug}_{request_id}.html"
+
+        path = self.output_dir / filename
+        path.write_text(profiler.output_html(), encoding="utf-8")
+        logger.info("Request profile saved", extra={"fields": {"profile": str(path)}})
+        self.enforce_retention()
+
+    def enforce_retention(self) -> None:
+        """Hapus profile terlama jika jumlah file melebihi max_files"""
+        profiles = sorted(self.output_dir.glob("*.html"), key=os.path.getmtime)
+        for old in profiles[: max(len(profiles) - self.max_files, 0)]:
+            old.unlink(missing_ok=True)
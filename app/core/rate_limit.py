@@ -0,0 +1,76 @@
+import math
+import time
+from collections import OrderedDict
+from itertools import islice
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket per key (mis. IP atau email) yang disimpan in-process.
+    Jumlah key dibatasi max_keys. Saat penuh, dari bucket yang paling lama tidak dipakai dibuang
+    bucket dengan token terbanyak (bucket yang sudah terisi penuh setara key baru), sehingga banjir
+    key acak tidak me-reset bucket yang sedang habis dan key baru tetap dilayani.
+    """
+
+    # Jumlah bucket terlama yang diperiksa per eviction (batas biaya per request)
+    EVICTION_SCAN = 64
+
+    __slots__ = ("capacity", "refill_rate", "max_keys", "_buckets", "allowed", "rejected", "evicted")
+
+    def __init__(self, capacity: int, refill_per_minute: float, max_keys: int = 10000):
+        self.capacity = float(capacity)
+        self.refill_rate = refill_per_minute / 60.0
+        self.max_keys = max_keys
+        # key -> (tokens, timestamp update terakhir)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def consume(self, key: str) -> tuple[bool, int]:
+        """Ambil satu token; return (diizinkan, retry_after dalam detik)"""
+        now = time.monotonic()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None and len(self._buckets) >= self.max_keys:
+            self._evict_fullest(now)
+        if bucket is None:
+            tokens = self.capacity
+        else:
+            tokens, last = bucket
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+            self.allowed += 1
+        else:
+            self.rejected += 1
+
+        self._buckets[key] = (tokens, now)
+
+        if allowed:
+            return True, 0
+        return False, self._retry_after(tokens)
+
+    def _retry_after(self, tokens: float) -> int:
+        return math.ceil((1.0 - tokens) / self.refill_rate) if self.refill_rate else 60
+
+    def _evict_fullest(self, now: float) -> None:
+        """Buang bucket dengan token terbanyak di antara EVICTION_SCAN bucket terlama"""
+        fullest_key, fullest_tokens = None, -1.0
+        for key, (tokens, last) in islice(self._buckets.items(), self.EVICTION_SCAN):
+            tokens = tokens + (now - last) * self.refill_rate
+            if tokens > fullest_tokens:
+                fullest_key, fullest_tokens = key, tokens
+                if tokens >= self.capacity:
+                    break
+        del self._buckets[fullest_key]
+        self.evicted += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "tracked_keys": len(self._buckets),
+        }
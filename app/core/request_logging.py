@@ -0,0 +1,223 @@
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("app.request")
+
+
+class RequestContext:
+    """State per request: ID untuk korelasi log + akumulasi durasi span"""
+
+    __slots__ = ("request_id", "spans", "endpoint_done_at")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        # nama span -> [total_ms, jumlah]
+        self.spans: dict[str, list] = {}
+        self.endpoint_done_at: Optional[float] = None
+
+    def add_span(self, name: str, elapsed_ms: float) -> None:
+        span_stats = self.spans.get(name)
+        if span_stats is None:
+            self.spans[name] = [elapsed_ms, 1]
+        else:
+            span_stats[0] += elapsed_ms
+            span_stats[1] += 1
+
+    def spans_summary(self) -> dict:
+        return {name: {"ms": round(total, 2), "count": count} for name, (total, count) in self.spans.items()}
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    ctx = _request_context.get()
+    return ctx.request_id if ctx else None
+
+
+class span:
+    """
+    Catat durasi sebuah blok ke request yang sedang berjalan, mis.:
+        with span("mongo"):
+            await collection.find_one(...)
+    Tidak melakukan apa-apa di luar request.
+    """
+
+    __slots__ = ("name", "ctx", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.ctx = _request_context.get()
+        if self.ctx is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.ctx is not None:
+            self.ctx.add_span(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log sebagai satu baris JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Dijalankan di thread pemanggil, sebelum record masuk queue
+        if not hasattr(record, "request_id"):
+            record.request_id = get_request_id()
+        return True
+
+
+_exc_formatter = logging.Formatter()
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler.prepare bawaan menggabungkan traceback ke msg; di sini message hanya di-resolve
+    dan traceback disimpan terpisah (exc_text) agar tetap menjadi field "exc" pada log JSON.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: str = "INFO") -> logging.handlers.QueueListener:
+    """
+    Logger "app" menulis ke queue; thread QueueListener yang memformat JSON dan menulis ke stdout,
+    sehingga I/O log tidak terjadi di event loop.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(_RequestIdFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = [queue_handler]
+    app_logger.setLevel(level.upper())
+    app_logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class RequestLoggingMiddleware:
+    """
+    Memberi setiap request sebuah ID (header X-Request-ID, diteruskan dari client jika ada)
+    dan menulis satu baris log per request berisi status, durasi total dan span.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id", "")[:64] or uuid.uuid4().hex
+        ctx = RequestContext(request_id)
+        token = _request_context.set(ctx)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            logger.info(
+                "request",
+                extra={
+                    "request_id": request_id,
+                    "fields": {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(duration_ms, 2),
+                        "spans": ctx.spans_summary(),
+                    },
+                },
+            )
+            _request_context.reset(token)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute yang mencatat span "serialization": waktu sejak endpoint selesai
+    sampai response (validasi response_model + JSON encoding) siap dikirim.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kw):
+            try:
+                return await endpoint(*args, **kw)
+            finally:
+                ctx = _request_context.get()
+                if ctx is not None:
+                    ctx.endpoint_done_at = time.perf_counter()
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        original_handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await original_handler(request)
+            ctx = _request_context.get()
+            if ctx is not None and ctx.endpoint_done_at is not None:
+                ctx.add_span("serialization", (time.perf_counter() - ctx.endpoint_done_at) * 1000)
+            return response
+
+        return timed_handler
@@ -1,5 +1,7 @@
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.core.deadline import PoolAdmission
 
 
 class MongoDB:
@@ -7,19 +9,22 @@ class MongoDB:
 
 
 mongodb = MongoDB()
+pool_admission = PoolAdmission(pool_size=settings.mongodb_max_pool_size)
+
+logger = logging.getLogger(__name__)
 
 
 async def connect_to_mongo():
     """Membuat koneksi ke MongoDB"""
-    mongodb.client = AsyncIOMotorClient(settings.mongodb_url)
-    print(f"Connected to MongoDB: {settings.mongodb_url}")
+    mongodb.client = AsyncIOMotorClient(settings.mongodb_url, maxPoolSize=settings.mongodb_max_pool_size)
+    logger.info("Connected to MongoDB")
 
 
 async def close_mongo_connection():
     """Menutup koneksi ke MongoDB"""
     if mongodb.client:
         mongodb.client.close()
-        print("Disconnected from MongoDB")
+        logger.info("Disconnected from MongoDB")
 
 
 def get_database():
@@ -0,0 +1,134 @@
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from app.db.repository import Repository, CategoryStatsRepository, FileRefRepository
+
+
+def _matches(doc: dict, filter: dict) -> bool:
+    return all(doc.get(key) == value for key, value in filter.items())
+
+
+class MemoryRepository(Repository):
+    """
+    Repository in-memory (dict per proses) untuk testing dan benchmark tanpa MongoDB.
+    Document yang dikembalikan selalu berupa salinan, sama seperti hasil query Motor.
+    """
+
+    def __init__(self):
+        self._docs: dict[ObjectId, dict] = {}
+
+    async def insert_one(self, doc: dict) -> ObjectId:
+        doc.setdefault("_id", ObjectId())
+        self._docs[doc["_id"]] = dict(doc)
+        return doc["_id"]
+
+    async def find_by_id(self, doc_id: ObjectId) -> Optional[dict]:
+        doc = self._docs.get(doc_id)
+        return dict(doc) if doc else None
+
+    async def find_by_ids(self, doc_ids: list[ObjectId]) -> list[dict]:
+        return [dict(self._docs[doc_id]) for doc_id in doc_ids if doc_id in self._docs]
+
+    async def find_one(self, filter: dict) -> Optional[dict]:
+        for doc in self._docs.values():
+            if _matches(doc, filter):
+                return dict(doc)
+        return None
+
+    async def find_many(self, filter: dict, skip: int = 0, limit: int = 0) -> list[dict]:
+        docs = [doc for doc in self._docs.values() if _matches(doc, filter)]
+        end = skip + limit if limit else None
+        return [dict(doc) for doc in docs[skip:end]]
+
+    async def count(self, filter: dict) -> int:
+        if not filter:
+            return len(self._docs)
+        return sum(1 for doc in self._docs.values() if _matches(doc, filter))
+
+    async def estimated_count(self) -> int:
+        return len(self._docs)
+
+    async def update_by_id(
+        self,
+        doc_id: ObjectId,
+        fields: dict,
+        expected_version: Optional[int] = None,
+        bump_version: bool = True,
+    ) -> Optional[tuple[dict, dict]]:
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            return None
+        if expected_version is not None and doc.get("version", 0) != expected_version:
+            return None
+        before = dict(doc)
+        doc.update(fields)
+        if bump_version:
+            doc["version"] = before.get("version", 0) + 1
+        return before, dict(doc)
+
+    async def delete_by_id(self, doc_id: ObjectId) -> Optional[dict]:
+        return self._docs.pop(doc_id, None)
+
+    def all(self) -> list[dict]:
+        return list(self._docs.values())
+
+
+class MemoryCategoryStatsRepository(CategoryStatsRepository):
+    """Statistik kategori in-memory; rebuild menghitung ulang dari MemoryRepository products"""
+
+    def __init__(self, products: MemoryRepository):
+        self.products = products
+        self._stats: dict[str, dict] = {}
+
+    async def increment(self, category: str, delta: dict, now: datetime) -> None:
+        stats = self._stats.setdefault(category, {"_id": category})
+        for key, value in delta.items():
+            stats[key] = stats.get(key, 0) + value
+        stats["updated_at"] = now
+
+    async def delete_if_empty(self, category: str) -> None:
+        stats = self._stats.get(category)
+        if stats and stats.get("product_count", 0) <= 0:
+            del self._stats[category]
+
+    async def list_nonempty(self) -> list[dict]:
+        return [
+            dict(self._stats[category])
+            for category in sorted(self._stats)
+            if self._stats[category].get("product_count", 0) > 0
+        ]
+
+    async def rebuild(self, now: datetime) -> None:
+        stats: dict[str, dict] = {}
+        for product in self.products.all():
+            entry = stats.setdefault(
+                product["category"],
+                {"_id": product["category"], "product_count": 0, "total_stock_value": 0,
+                 "price_sum": 0, "rating_sum": 0, "updated_at": now},
+            )
+            entry["product_count"] += 1
+            entry["total_stock_value"] += product["price"] * product["stock_available"]
+            entry["price_sum"] += product["price"]
+            entry["rating_sum"] += (product.get("display_info") or {}).get("rating") or 0
+        self._stats = stats
+
+
+class MemoryFileRefRepository(FileRefRepository):
+    def __init__(self):
+        self._refs: dict[str, int] = {}
+
+    async def increment(self, path: str) -> int:
+        self._refs[path] = self._refs.get(path, 0) + 1
+        return self._refs[path]
+
+    async def decrement(self, path: str) -> Optional[int]:
+        if path not in self._refs:
+            return None
+        self._refs[path] -= 1
+        return self._refs[path]
+
+    async def delete_if_unreferenced(self, path: str) -> bool:
+        if self._refs.get(path, 1) <= 0:
+            del self._refs[path]
+            return True
+        return False
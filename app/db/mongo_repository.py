@@ -0,0 +1,187 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.core.deadline import remaining_ms
+from app.core.request_logging import span
+from app.db.connection import get_database, pool_admission
+from app.db.repository import Repository, CategoryStatsRepository, FileRefRepository
+
+
+def _max_time() -> dict:
+    """Opsi maxTimeMS untuk command MongoDB sesuai sisa deadline request"""
+    budget = remaining_ms()
+    return {"maxTimeMS": max(budget, 1)} if budget is not None else {}
+
+
+@asynccontextmanager
+async def _operation():
+    """Admission control pool + span "mongo" untuk setiap operasi"""
+    async with pool_admission.slot():
+        with span("mongo"):
+            yield
+
+
+def _cursor_max_time() -> dict:
+    budget = remaining_ms()
+    return {"max_time_ms": max(budget, 1)} if budget is not None else {}
+
+
+class MongoRepository(Repository):
+    """Repository berbasis Motor untuk satu collection"""
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        # Diambil saat dipakai karena client baru dibuat saat startup
+        return get_database()[self.collection_name]
+
+    async def insert_one(self, doc: dict) -> ObjectId:
+        async with _operation():
+            result = await self.collection.insert_one(doc)
+        return result.inserted_id
+
+    async def find_by_id(self, doc_id: ObjectId) -> Optional[dict]:
+        async with _operation():
+            return await self.collection.find_one({"_id": doc_id}, **_cursor_max_time())
+
+    async def find_by_ids(self, doc_ids: list[ObjectId]) -> list[dict]:
+        async with _operation():
+            cursor = self.collection.find({"_id": {"$in": doc_ids}}, **_cursor_max_time())
+            return await cursor.to_list(length=None)
+
+    async def find_one(self, filter: dict) -> Optional[dict]:
+        async with _operation():
+            return await self.collection.find_one(filter, **_cursor_max_time())
+
+    async def find_many(self, filter: dict, skip: int = 0, limit: int = 0) -> list[dict]:
+        async with _operation():
+            cursor = self.collection.find(filter, **_cursor_max_time()).skip(skip).limit(limit)
+            return await cursor.to_list(length=None)
+
+    async def count(self, filter: dict) -> int:
+        async with _operation():
+            return await self.collection.count_documents(filter, **_max_time())
+
+    async def estimated_count(self) -> int:
+        async with _operation():
+            return await self.collection.estimated_document_count(**_max_time())
+
+    async def update_by_id(
+        self,
+        doc_id: ObjectId,
+        fields: dict,
+        expected_version: Optional[int] = None,
+        bump_version: bool = True,
+    ) -> Optional[tuple[dict, dict]]:
+        filter = {"_id": doc_id}
+        if expected_version is not None:
+            filter["version"] = expected_version if expected_version > 0 else {"$in": [0, None]}
+
+        update = {"$set": fields, "$inc": {"version": 1}} if bump_version else {"$set": fields}
+        async with _operation():
+            before = await self.collection.find_one_and_update(
+                filter,
+                update,
+                return_document=ReturnDocument.BEFORE,
+                **_max_time(),
+            )
+        if before is None:
+            return None
+        # Document sesudah dihitung lokal dari $set/$inc, tanpa query tambahan
+        after = {**before, **fields}
+        if bump_version:
+            after["version"] = before.get("version", 0) + 1
+        return before, after
+
+    async def delete_by_id(self, doc_id: ObjectId) -> Optional[dict]:
+        async with _operation():
+            return await self.collection.find_one_and_delete({"_id": doc_id}, **_max_time())
+
+
+class MongoCategoryStatsRepository(CategoryStatsRepository):
+    """Statistik kategori di collection category_stats"""
+
+    @property
+    def collection(self):
+        return get_database().category_stats
+
+    async def increment(self, category: str, delta: dict, now: datetime) -> None:
+        async with _operation():
+            await self.collection.update_one(
+                {"_id": category},
+                {"$inc": delta, "$set": {"updated_at": now}},
+                upsert=True,
+            )
+
+    async def delete_if_empty(self, category: str) -> None:
+        async with _operation():
+            await self.collection.delete_one({"_id": category, "product_count": {"$lte": 0}})
+
+    async def list_nonempty(self) -> list[dict]:
+        async with _operation():
+            cursor = self.collection.find({"product_count": {"$gt": 0}}, **_cursor_max_time()).sort("_id", 1)
+            return await cursor.to_list(length=None)
+
+    async def rebuild(self, now: datetime) -> None:
+        pipeline = [
+            {
+                "$group": {
+                    "_id": "$category",
+                    "product_count": {"$sum": 1},
+                    "total_stock_value": {"$sum": {"$multiply": ["$price", "$stock_available"]}},
+                    "price_sum": {"$sum": "$price"},
+                    "rating_sum": {"$sum": {"$ifNull": ["$display_info.rating", 0]}},
+                }
+            },
+            {"$set": {"updated_at": now}},
+            {
+                "$merge": {
+                    "into": "category_stats",
+                    "on": "_id",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+        async with _operation():
+            async for _ in get_database().products.aggregate(pipeline, **_max_time()):
+                pass
+
+            # Hapus kategori yang sudah tidak memiliki product
+            await self.collection.delete_many({"updated_at": {"$lt": now}})
+
+
+class MongoFileRefRepository(FileRefRepository):
+    """Reference count file upload di collection uploads ({_id: path, refs: n})"""
+
+    @property
+    def collection(self):
+        return get_database().uploads
+
+    async def increment(self, path: str) -> int:
+        async with _operation():
+            doc = await self.collection.find_one_and_update(
+                {"_id": path},
+                {"$inc": {"refs": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        return doc["refs"]
+
+    async def decrement(self, path: str) -> Optional[int]:
+        async with _operation():
+            doc = await self.collection.find_one_and_update(
+                {"_id": path},
+                {"$inc": {"refs": -1}},
+                return_document=ReturnDocument.AFTER,
+            )
+        return doc["refs"] if doc else None
+
+    async def delete_if_unreferenced(self, path: str) -> bool:
+        async with _operation():
+            result = await self.collection.delete_one({"_id": path, "refs": {"$lte": 0}})
+        return result.deleted_count > 0
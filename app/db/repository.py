@@ -0,0 +1,155 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+from bson import ObjectId
+from app.core.config import settings
+
+
+class Repository(ABC):
+    """
+    Interface penyimpanan document (users / products).
+    Filter yang didukung hanya equality sederhana, mis. {"email": "a@b.com"}.
+    """
+
+    @abstractmethod
+    async def insert_one(self, doc: dict) -> ObjectId:
+        """Simpan document baru; doc["_id"] diisi seperti insert_one Motor"""
+
+    @abstractmethod
+    async def find_by_id(self, doc_id: ObjectId) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def find_by_ids(self, doc_ids: list[ObjectId]) -> list[dict]:
+        """Ambil banyak document dalam satu query ($in); urutan hasil tidak dijamin"""
+
+    @abstractmethod
+    async def find_one(self, filter: dict) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def find_many(self, filter: dict, skip: int = 0, limit: int = 0) -> list[dict]:
+        ...
+
+    @abstractmethod
+    async def count(self, filter: dict) -> int:
+        ...
+
+    @abstractmethod
+    async def estimated_count(self) -> int:
+        """Perkiraan jumlah document dari metadata collection (tanpa scan)"""
+
+    @abstractmethod
+    async def update_by_id(
+        self,
+        doc_id: ObjectId,
+        fields: dict,
+        expected_version: Optional[int] = None,
+        bump_version: bool = True,
+    ) -> Optional[tuple[dict, dict]]:
+        """
+        $set fields dan naikkan field version dalam satu operasi atomic.
+        Jika expected_version diisi, update hanya terjadi bila version document sama
+        (document lama tanpa field version dianggap version 0).
+        bump_version=False untuk perubahan internal yang tidak boleh membatalkan ETag client.
+        Return (document sebelum, document sesudah), None jika tidak ada yang ter-update.
+        """
+
+    @abstractmethod
+    async def delete_by_id(self, doc_id: ObjectId) -> Optional[dict]:
+        """Hapus document lalu return document yang dihapus (None jika tidak ditemukan)"""
+
+
+class CategoryStatsRepository(ABC):
+    """Penyimpanan materialized statistik kategori product"""
+
+    @abstractmethod
+    async def increment(self, category: str, delta: dict, now: datetime) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_if_empty(self, category: str) -> None:
+        ...
+
+    @abstractmethod
+    async def list_nonempty(self) -> list[dict]:
+        """Semua kategori dengan product_count > 0, urut berdasarkan nama"""
+
+    @abstractmethod
+    async def rebuild(self, now: datetime) -> None:
+        """Hitung ulang seluruh statistik dari collection products"""
+
+
+class FileRefRepository(ABC):
+    """Reference count file upload (content-addressed) berdasarkan path"""
+
+    @abstractmethod
+    async def increment(self, path: str) -> int:
+        """Tambah satu referensi; return jumlah referensi setelahnya"""
+
+    @abstractmethod
+    async def decrement(self, path: str) -> Optional[int]:
+        """Kurangi satu referensi; return sisa referensi, None jika path tidak tercatat"""
+
+    @abstractmethod
+    async def delete_if_unreferenced(self, path: str) -> bool:
+        """Hapus catatan path jika referensi <= 0; return True jika terhapus"""
+
+
+class Repositories:
+    def __init__(
+        self,
+        users: Repository,
+        products: Repository,
+        category_stats: CategoryStatsRepository,
+        file_refs: FileRefRepository,
+    ):
+        self.users = users
+        self.products = products
+        self.category_stats = category_stats
+        self.file_refs = file_refs
+
+
+@lru_cache
+def get_repositories() -> Repositories:
+    """Membuat repository sesuai settings.storage_backend ("mongo" atau "memory")"""
+    if settings.storage_backend == "memory":
+        from app.db.memory_repository import (
+            MemoryRepository,
+            MemoryCategoryStatsRepository,
+            MemoryFileRefRepository,
+        )
+
+        products = MemoryRepository()
+        return Repositories(
+            users=MemoryRepository(),
+            products=products,
+            category_stats=MemoryCategoryStatsRepository(products),
+            file_refs=MemoryFileRefRepository(),
+        )
+
+    from app.db.mongo_repository import MongoRepository, MongoCategoryStatsRepository, MongoFileRefRepository
+
+    return Repositories(
+        users=MongoRepository("users"),
+        products=MongoRepository("products"),
+        category_stats=MongoCategoryStatsRepository(),
+        file_refs=MongoFileRefRepository(),
+    )
+
+
+def get_user_repository() -> Repository:
+    return get_repositories().users
+
+
+def get_product_repository() -> Repository:
+    return get_repositories().products
+
+
+def get_category_stats_repository() -> CategoryStatsRepository:
+    return get_repositories().category_stats
+
+
+def get_file_ref_repository() -> FileRefRepository:
+    return get_repositories().file_refs
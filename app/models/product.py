@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, BeforeValidator
+from pydantic import BaseModel, Field, BeforeValidator, computed_field
 from typing import Optional, Annotated
 from datetime import datetime
+from app.utils.image_variants import variant_urls
 
 PyObjectId = Annotated[str, BeforeValidator(str)]
 
@@ -49,9 +50,16 @@ class ProductResponse(BaseModel):
     stock_warning_threshold: int
     display_info: DisplayInfo
     status: str
+    version: int = 0
     created_at: datetime
     updated_at: datetime
 
+    @computed_field
+    @property
+    def image_variants(self) -> Optional[dict[str, str]]:
+        """URL variant gambar (thumb, medium, + webp) di samping image_url"""
+        return variant_urls(self.image_url)
+
     class Config:
         populate_by_name = True
         from_attributes = True
@@ -60,3 +68,16 @@ class ProductResponse(BaseModel):
 class ProductListResponse(BaseModel):
     products: list[ProductResponse]
     total: int
+    missing_ids: list[str] = []
+
+
+class CategoryStatsResponse(BaseModel):
+    category: str
+    product_count: int
+    total_stock_value: float
+    average_price: float
+    average_rating: float
+
+
+class CategoryStatsListResponse(BaseModel):
+    categories: list[CategoryStatsResponse]
@@ -36,6 +36,7 @@ class UserResponse(BaseModel):
     phone: Optional[str] = None
     profile_img: Optional[str] = None
     status: str
+    version: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -47,6 +48,7 @@ class UserResponse(BaseModel):
 class UserListResponse(BaseModel):
     users: list[UserResponse]
     total: int
+    missing_ids: list[str] = []
 
 
 class LoginResponse(BaseModel):
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict
+from typing import Literal, Optional
+from app.db.repository import Repository
+
+# exact: count_documents; estimated: metadata collection (tanpa filter); cached: counter in-process
+TotalMode = Literal["exact", "estimated", "cached"]
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionCounter:
+    """
+    Total document per collection untuk endpoint list.
+    Total tanpa filter di-update oleh create/delete (adjust) dan direkonsiliasi
+    dengan count_documents di background setiap reconcile_seconds.
+    Total dengan filter di-cache per signature filter selama filter_ttl detik.
+    """
+
+    def __init__(self, reconcile_seconds: float = 60.0, filter_ttl: float = 5.0, max_filters: int = 1000):
+        self.reconcile_seconds = reconcile_seconds
+        self.filter_ttl = filter_ttl
+        self.max_filters = max_filters
+        self._total: Optional[int] = None
+        self._reconciled_at = 0.0
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._filtered: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+
+    async def get_total(self, repo: Repository, filter: dict, mode: TotalMode) -> int:
+        if mode == "exact":
+            return await repo.count(filter)
+        if filter:
+            # estimated_document_count tidak mendukung filter -> pakai cache per filter
+            return await self._filtered_total(repo, filter)
+        if mode == "estimated":
+            return await repo.estimated_count()
+        return await self._cached_total(repo)
+
+    async def _cached_total(self, repo: Repository) -> int:
+        if self._total is None:
+            await self._reconcile(repo)
+        elif time.monotonic() - self._reconciled_at > self.reconcile_seconds:
+            if self._reconcile_task is None or self._reconcile_task.done():
+                # Context kosong: task tidak mewarisi deadline/log context request yang memicunya
+                self._reconcile_task = contextvars.Context().run(asyncio.create_task, self._background_reconcile(repo))
+        return self._total
+
+    async def _reconcile(self, repo: Repository) -> None:
+        self._total = await repo.count({})
+        self._reconciled_at = time.monotonic()
+
+    async def _background_reconcile(self, repo: Repository) -> None:
+        try:
+            await self._reconcile(repo)
+        except Exception:
+            # Total lama tetap dipakai; dicoba lagi setelah reconcile_seconds berikutnya
+            self._reconciled_at = time.monotonic()
+            logger.exception("Gagal rekonsiliasi total collection")
+
+    async def _filtered_total(self, repo: Repository, filter: dict) -> int:
+        signature = tuple(sorted(filter.items()))
+        entry = self._filtered.get(signature)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        total = await repo.count(filter)
+        self._filtered[signature] = (time.monotonic() + self.filter_ttl, total)
+        self._filtered.move_to_end(signature)
+        while len(self._filtered) > self.max_filters:
+            self._filtered.popitem(last=False)
+        return total
+
+    def adjust(self, delta: int) -> None:
+        """Dipanggil setelah insert (+1) / delete (-1)"""
+        if self._total is not None:
+            self._total = max(self._total + delta, 0)
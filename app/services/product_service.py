@@ -1,17 +1,30 @@
 from typing import Optional
 from datetime import datetime, timezone
 from bson import ObjectId
-from pathlib import Path
-import os
-from app.db.connection import get_database
+from app.core.config import settings
+from app.core.deadline import end_deadline
+from app.db.repository import get_product_repository
 from app.models.product import ProductCreateRequest, ProductUpdateRequest, ProductResponse
 from app.utils.helpers import generate_display_info
+from app.services.stats_service import apply_product_change
+from app.services.upload_service import release_upload
+from app.services.count_service import CollectionCounter, TotalMode
+from app.utils.cache import CoalescingCache
+from app.utils.helpers import raise_version_conflict
+
+product_cache = CoalescingCache(
+    ttl=settings.lookup_cache_ttl_seconds,
+    max_entries=settings.lookup_cache_max_entries,
+)
+product_counter = CollectionCounter(
+    reconcile_seconds=settings.count_reconcile_seconds,
+    filter_ttl=settings.count_filter_ttl_seconds,
+)
 
 
 async def create_product(product_data: ProductCreateRequest) -> ProductResponse:
     """Membuat product baru dengan display_info auto-generated"""
-    db = get_database()
-    products_collection = db.products
+    products_repo = get_product_repository()
     
     # Generate display_info otomatis
     display_info = generate_display_info()
@@ -28,49 +41,75 @@ async def create_product(product_data: ProductCreateRequest) -> ProductResponse:
         "stock_warning_threshold": product_data.stock_warning_threshold,
         "display_info": display_info,
         "status": product_data.status,
+        "version": 1,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
     
-    result = await products_collection.insert_one(product_doc)
-    product_doc["_id"] = result.inserted_id
+    # image_url dari save_uploaded_file sudah memegang referensi; dilepas jika product gagal disimpan
+    try:
+        await products_repo.insert_one(product_doc)
+    except Exception:
+        await release_upload(product_doc["image_url"])
+        raise
+    end_deadline()
+    product_counter.adjust(1)
+    await apply_product_change(None, product_doc)
     
     return ProductResponse(**product_doc)
 
 
 async def get_product_by_id(product_id: str) -> Optional[ProductResponse]:
-    """Mengambil product berdasarkan ID"""
-    db = get_database()
-    products_collection = db.products
-    
+    """Mengambil product berdasarkan ID (lookup konkuren untuk ID yang sama digabung)"""
     if not ObjectId.is_valid(product_id):
         return None
     
-    product = await products_collection.find_one({"_id": ObjectId(product_id)})
+    return await product_cache.get(ObjectId(product_id), lambda: _find_product_by_id(product_id))
+
+
+async def _find_product_by_id(product_id: str) -> Optional[ProductResponse]:
+    products_repo = get_product_repository()
+    
+    product = await products_repo.find_by_id(ObjectId(product_id))
     if not product:
         return None
     
     return ProductResponse(**product)
 
 
-async def get_all_products(skip: int = 0, limit: int = 100) -> tuple[list[ProductResponse], int]:
-    """Mengambil semua products dengan pagination"""
-    db = get_database()
-    products_collection = db.products
+async def get_all_products(
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+) -> tuple[list[ProductResponse], int]:
+    """Mengambil semua products dengan pagination (opsional filter category/status)"""
+    products_repo = get_product_repository()
+    filter = {key: value for key, value in {"category": category, "status": status}.items() if value is not None}
     
     # Hitung total
-    total = await products_collection.count_documents({})
+    total = await product_counter.get_total(products_repo, filter, total_mode)
     
     # Ambil products
-    cursor = products_collection.find({}).skip(skip).limit(limit)
-    products = []
-    
-    async for product in cursor:
-        products.append(ProductResponse(**product))
+    products = [ProductResponse(**product) for product in await products_repo.find_many(filter, skip=skip, limit=limit)]
     
     return products, total
 
 
+async def get_products_by_ids(product_ids: list[str]) -> tuple[list[ProductResponse], list[str]]:
+    """Mengambil banyak product sekaligus ($in), urut sesuai ID yang diminta + daftar ID yang tidak ditemukan"""
+    products_repo = get_product_repository()
+    
+    requested = list(dict.fromkeys(product_ids))
+    valid_ids = [ObjectId(product_id) for product_id in requested if ObjectId.is_valid(product_id)]
+    found = {str(product["_id"]): product for product in await products_repo.find_by_ids(valid_ids)} if valid_ids else {}
+    
+    products = [ProductResponse(**found[product_id]) for product_id in requested if product_id in found]
+    missing_ids = [product_id for product_id in requested if product_id not in found]
+    return products, missing_ids
+
+
 # async def update_product(product_id: str, product_data: ProductUpdateRequest) -> Optional[ProductResponse]:
 #     """Update product dengan display_info auto-regenerated"""
 #     db = get_database()
@@ -102,61 +141,80 @@ async def get_all_products(skip: int = 0, limit: int = 100) -> tuple[list[Produc
 #     updated_product = await products_collection.find_one({"_id": ObjectId(product_id)})
 #     return ProductResponse(**updated_product)
 
-async def update_product(product_id: str, product_data: ProductUpdateRequest) -> Optional[dict]:
-    """Update product dengan auto-cleanup gambar lama dan regenerasi display_info"""
-    db = get_database()
-    products_collection = db.products
+async def update_product(
+    product_id: str,
+    product_data: ProductUpdateRequest,
+    expected_version: Optional[int] = None,
+) -> Optional[dict]:
+    """
+    Update product dengan auto-cleanup gambar lama dan regenerasi display_info.
+    expected_version (dari If-Match) -> 412 jika product sudah diubah oleh request lain.
+    """
+    products_repo = get_product_repository()
     
     if not ObjectId.is_valid(product_id):
-        return None
-    
-    # Ambil data produk lama untuk mendapatkan path gambar lama
-    old_product = await products_collection.find_one({"_id": ObjectId(product_id)})
-    if not old_product:
+        # Lepas referensi gambar yang sudah diambil saat upload
+        await release_upload(product_data.image_url)
         return None
 
-    # Ambil data yang dikirim oleh user (mengabaikan field yang tidak dikirim)
-    update_data = product_data.model_dump(exclude_unset=True)
-    
-    # Pembersihan Gambar Lama
-    if "image_url" in update_data and update_data["image_url"]:
-        old_image_path = old_product.get("image_url")
-        
-        # Cek jika sebelumnya memang sudah ada gambar (bukan None/kosong)
-        if old_image_path:
-            file_to_delete = Path(old_image_path)
-            
-            try:
-                if file_to_delete.exists() and file_to_delete.is_file():
-                    os.remove(file_to_delete)
-                    print(f"DEBUG: File lama berhasil dihapus: {file_to_delete}")
-            except Exception as e:
-                print(f"WARNING: Gagal menghapus file fisik: {e}")
-
-   
-    if not update_data and not "image_url" in update_data:
-        return old_product
+    # Ambil data yang dikirim oleh user (mengabaikan field yang tidak dikirim atau bernilai null)
+    update_data = {k: v for k, v in product_data.model_dump(exclude_unset=True).items() if v is not None}
+    
+    if not update_data:
+        product = await products_repo.find_by_id(ObjectId(product_id))
+        if product and expected_version is not None and product.get("version", 0) != expected_version:
+            raise_version_conflict()
+        return product
     
     # Tambahkan metadata otomatis (regenerate display_info)
     update_data["display_info"] = generate_display_info()
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    await products_collection.update_one(
-        {"_id": ObjectId(product_id)},
-        {"$set": update_data}
-    )
+    # image_url hanya ada jika file di-upload (sudah memegang referensi dari save_uploaded_file)
+    new_upload = update_data.get("image_url")
+    try:
+        result = await products_repo.update_by_id(ObjectId(product_id), update_data, expected_version)
+    except Exception:
+        await release_upload(new_upload)
+        raise
+    end_deadline()
+    product_cache.invalidate(ObjectId(product_id))
+    
+    if result is None:
+        await release_upload(new_upload)
+        # Bedakan product tidak ada (404) dan version tidak cocok (412)
+        if expected_version is not None and await products_repo.find_by_id(ObjectId(product_id)):
+            raise_version_conflict()
+        return None
     
-    updated_doc = await products_collection.find_one({"_id": ObjectId(product_id)})
+    old_product, updated_doc = result
+    await apply_product_change(old_product, updated_doc)
+    
+    # Ganti referensi gambar; file lama hanya dihapus jika tidak dipakai document lain
+    old_image_path = old_product.get("image_url")
+    new_image_path = updated_doc.get("image_url")
+    if new_image_path != old_image_path:
+        await release_upload(old_image_path)
+    elif new_upload:
+        # File yang sama di-upload ulang: referensi tambahan dari upload dilepas
+        await release_upload(new_upload)
     return updated_doc
     
 
 async def delete_product(product_id: str) -> bool:
     """Hapus product"""
-    db = get_database()
-    products_collection = db.products
+    products_repo = get_product_repository()
     
     if not ObjectId.is_valid(product_id):
         return False
     
-    result = await products_collection.delete_one({"_id": ObjectId(product_id)})
-    return result.deleted_count > 0
+    deleted_product = await products_repo.delete_by_id(ObjectId(product_id))
+    end_deadline()
+    product_cache.invalidate(ObjectId(product_id))
+    if not deleted_product:
+        return False
+    
+    product_counter.adjust(-1)
+    await release_upload(deleted_product.get("image_url"))
+    await apply_product_change(deleted_product, None)
+    return True
@@ -0,0 +1,71 @@
+from typing import Optional
+from datetime import datetime, timezone
+from app.db.repository import get_category_stats_repository
+from app.models.product import CategoryStatsResponse
+
+# Field akumulator yang disimpan per kategori di collection category_stats
+STAT_FIELDS = ("product_count", "total_stock_value", "price_sum", "rating_sum")
+
+
+def product_contribution(product: dict) -> dict:
+    """Kontribusi satu product terhadap statistik kategorinya"""
+    price = product.get("price") or 0
+    stock = product.get("stock_available") or 0
+    rating = (product.get("display_info") or {}).get("rating") or 0
+    return {
+        "product_count": 1,
+        "total_stock_value": price * stock,
+        "price_sum": price,
+        "rating_sum": rating,
+    }
+
+
+async def apply_product_change(old_product: Optional[dict], new_product: Optional[dict]) -> None:
+    """
+    Update statistik kategori secara incremental.
+    old_product=None berarti create, new_product=None berarti delete.
+    """
+    stats_repo = get_category_stats_repository()
+
+    deltas: dict[str, dict] = {}
+    if old_product:
+        delta = deltas.setdefault(old_product["category"], dict.fromkeys(STAT_FIELDS, 0))
+        for key, value in product_contribution(old_product).items():
+            delta[key] -= value
+    if new_product:
+        delta = deltas.setdefault(new_product["category"], dict.fromkeys(STAT_FIELDS, 0))
+        for key, value in product_contribution(new_product).items():
+            delta[key] += value
+
+    now = datetime.now(timezone.utc)
+    for category, delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        await stats_repo.increment(category, delta, now)
+        if delta["product_count"] < 0:
+            # Kategori tanpa product dihapus dari materialized view
+            await stats_repo.delete_if_empty(category)
+
+
+def _to_response(doc: dict) -> CategoryStatsResponse:
+    count = doc.get("product_count", 0)
+    return CategoryStatsResponse(
+        category=doc["_id"],
+        product_count=count,
+        total_stock_value=round(doc.get("total_stock_value", 0), 2),
+        average_price=round(doc.get("price_sum", 0) / count, 2) if count else 0.0,
+        average_rating=round(doc.get("rating_sum", 0) / count, 2) if count else 0.0,
+    )
+
+
+async def get_category_stats() -> list[CategoryStatsResponse]:
+    """Mengambil statistik semua kategori dari materialized collection"""
+    stats_repo = get_category_stats_repository()
+    return [_to_response(doc) for doc in await stats_repo.list_nonempty()]
+
+
+async def rebuild_category_stats() -> list[CategoryStatsResponse]:
+    """Rebuild penuh statistik kategori dari collection products ($group + $merge di MongoDB)"""
+    stats_repo = get_category_stats_repository()
+    await stats_repo.rebuild(datetime.now(timezone.utc))
+    return await get_category_stats()
@@ -0,0 +1,91 @@
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+from fastapi import UploadFile
+from app.core.deadline import end_deadline
+from app.core.request_logging import span
+from app.db.repository import get_file_ref_repository
+from app.utils.file_upload import UPLOAD_DIR, read_uploaded_file, write_uploaded_file
+from app.utils.image_variants import all_variant_paths
+
+logger = logging.getLogger(__name__)
+
+
+def _is_managed_upload(path: Optional[str]) -> bool:
+    """Hanya file di dalam folder uploads yang boleh dikelola/dihapus"""
+    if not path:
+        return False
+    upload_root = Path(UPLOAD_DIR).resolve()
+    return upload_root in Path(path).resolve().parents
+
+
+async def acquire_upload(path: Optional[str]) -> None:
+    """Catat satu document baru yang mereferensikan file upload"""
+    if not _is_managed_upload(path):
+        return
+    await get_file_ref_repository().increment(path)
+
+
+async def save_uploaded_file(file: UploadFile, subfolder: str = "") -> str:
+    """
+    Simpan file upload dan return URL relative path yang sudah memegang satu referensi.
+    Referensi diambil sebelum cek file ada/tidak, sehingga release paralel tidak bisa
+    menghapus file yang baru saja dipakai ulang. Document yang memakai path ini mengambil
+    alih referensi tersebut; jika document gagal disimpan, panggil release_upload(path).
+    """
+    file_path, content = await read_uploaded_file(file, subfolder)
+    await acquire_upload(file_path)
+    try:
+        await write_uploaded_file(file_path, content)
+    except Exception:
+        await release_upload(file_path)
+        raise
+    return file_path
+
+
+async def release_upload(path: Optional[str]) -> None:
+    """Lepas satu referensi; file fisik baru dihapus saat referensi terakhir hilang"""
+    if not _is_managed_upload(path):
+        return
+    # Cleanup/bookkeeping tidak boleh di-shed: referensi yang tidak dilepas membuat file bocor
+    end_deadline()
+
+    file_refs = get_file_ref_repository()
+    remaining = await file_refs.decrement(path)
+    if remaining is None:
+        # File lama (sebelum reference counting) yang hanya dipakai satu document
+        _remove_files([path, *all_variant_paths(path)])
+        return
+    if remaining > 0:
+        return
+
+    # File dipindah dulu sebelum catatan referensi dihapus: upload yang mengambil referensi
+    # setelah ini tidak menemukan file lalu menulisnya ulang, dan jika referensi diambil
+    # sebelum catatan terhapus, file dikembalikan.
+    trash_path = f"{path}.{uuid.uuid4().hex[:8]}.deleting"
+    try:
+        os.replace(path, trash_path)
+    except FileNotFoundError:
+        trash_path = None
+
+    if not await file_refs.delete_if_unreferenced(path):
+        if trash_path:
+            os.replace(trash_path, path)
+        return
+
+    # Hapus file asli beserta variant (thumb/medium/webp) jika ada
+    _remove_files([trash_path, *all_variant_paths(path)] if trash_path else all_variant_paths(path))
+
+
+def _remove_files(paths: list[str]) -> None:
+    with span("file_io"):
+        for file_path in paths:
+            file_to_delete = Path(file_path)
+            try:
+                if file_to_delete.exists() and file_to_delete.is_file():
+                    os.remove(file_to_delete)
+                    logger.debug("File tidak lagi direferensikan, dihapus: %s", file_to_delete)
+            except Exception as e:
+                logger.warning("Gagal menghapus file fisik %s: %s", file_to_delete, e)
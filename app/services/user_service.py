@@ -1,18 +1,47 @@
 from typing import Optional
-import os
-from pathlib import Path
 from datetime import datetime, timezone
 from bson import ObjectId
 from fastapi import HTTPException, status
-from app.db.connection import get_database
-from app.core.security import get_password_hash, verify_password
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.deadline import end_deadline
+from app.db.repository import get_user_repository
+from app.core.request_logging import span
+from app.core.security import get_password_hash, verify_and_update_password
 from app.models.user import UserCreateRequest, UserUpdateRequest, UserResponse
+from app.services.count_service import CollectionCounter, TotalMode
+from app.services.upload_service import release_upload
+from app.utils.cache import CoalescingCache
+from app.utils.helpers import raise_version_conflict
+
+user_cache = CoalescingCache(
+    ttl=settings.lookup_cache_ttl_seconds,
+    max_entries=settings.lookup_cache_max_entries,
+)
+user_counter = CollectionCounter(
+    reconcile_seconds=settings.count_reconcile_seconds,
+    filter_ttl=settings.count_filter_ttl_seconds,
+)
 
 
 async def create_user(user_data: UserCreateRequest) -> UserResponse:
     """Membuat user baru dengan validasi email unique"""
-    db = get_database()
-    users_collection = db.users
+    # profile_img dari save_uploaded_file sudah memegang referensi; dilepas jika user gagal disimpan
+    try:
+        user_doc = await _insert_user(user_data)
+    except Exception:
+        await release_upload(user_data.profile_img)
+        raise
+    end_deadline()
+    user_counter.adjust(1)
+    
+    # Hapus password dari response
+    user_doc.pop("password")
+    return UserResponse(**user_doc)
+
+
+async def _insert_user(user_data: UserCreateRequest) -> dict:
+    users_repo = get_user_repository()
     
     # Check if email already exists
     existing_user = await get_user_by_email(user_data.email)
@@ -22,8 +51,9 @@ async def create_user(user_data: UserCreateRequest) -> UserResponse:
             detail="Email already registered"
         )
     
-    # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    # Hash password (di threadpool agar bcrypt tidak memblokir event loop)
+    with span("bcrypt"):
+        hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     
     # Buat document user
     user_doc = {
@@ -33,35 +63,34 @@ async def create_user(user_data: UserCreateRequest) -> UserResponse:
         "password": hashed_password,
         "profile_img": user_data.profile_img,
         "status": user_data.status,
+        "version": 1,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
     
-    result = await users_collection.insert_one(user_doc)
-    user_doc["_id"] = result.inserted_id
-    
-    # Hapus password dari response
-    user_doc.pop("password")
-    return UserResponse(**user_doc)
+    await users_repo.insert_one(user_doc)
+    return user_doc
 
 
 async def get_user_by_email(email: str) -> Optional[dict]:
     """Mengambil user berdasarkan email"""
-    db = get_database()
-    users_collection = db.users
-    user = await users_collection.find_one({"email": email})
+    users_repo = get_user_repository()
+    user = await users_repo.find_one({"email": email})
     return user
 
 
 async def get_user_by_id(user_id: str) -> Optional[UserResponse]:
-    """Mengambil user berdasarkan ID"""
-    db = get_database()
-    users_collection = db.users
-    
+    """Mengambil user berdasarkan ID (lookup konkuren untuk ID yang sama digabung)"""
     if not ObjectId.is_valid(user_id):
         return None
     
-    user = await users_collection.find_one({"_id": ObjectId(user_id)})
+    return await user_cache.get(ObjectId(user_id), lambda: _find_user_by_id(user_id))
+
+
+async def _find_user_by_id(user_id: str) -> Optional[UserResponse]:
+    users_repo = get_user_repository()
+    
+    user = await users_repo.find_by_id(ObjectId(user_id))
     if not user:
         return None
     
@@ -70,85 +99,118 @@ async def get_user_by_id(user_id: str) -> Optional[UserResponse]:
     return UserResponse(**user)
 
 
-async def get_all_users(skip: int = 0, limit: int = 100) -> tuple[list[UserResponse], int]:
-    """Mengambil semua users dengan pagination"""
-    db = get_database()
-    users_collection = db.users
+async def get_all_users(
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+) -> tuple[list[UserResponse], int]:
+    """Mengambil semua users dengan pagination (opsional filter status)"""
+    users_repo = get_user_repository()
+    filter = {"status": status} if status is not None else {}
     
     # Hitung total
-    total = await users_collection.count_documents({})
+    total = await user_counter.get_total(users_repo, filter, total_mode)
     
     # Ambil users
-    cursor = users_collection.find({}).skip(skip).limit(limit)
     users = []
     
-    async for user in cursor:
+    for user in await users_repo.find_many(filter, skip=skip, limit=limit):
         user.pop("password", None)  # Hapus password
         users.append(UserResponse(**user))
     
     return users, total
 
 
-async def update_user(user_id: str, user_data: UserUpdateRequest) -> Optional[UserResponse]:
-    """Update user dengan pembersihan foto profil lama"""
-    db = get_database()
-    users_collection = db.users
+async def get_users_by_ids(user_ids: list[str]) -> tuple[list[UserResponse], list[str]]:
+    """Mengambil banyak user sekaligus ($in), urut sesuai ID yang diminta + daftar ID yang tidak ditemukan"""
+    users_repo = get_user_repository()
     
-    if not ObjectId.is_valid(user_id):
-        return None
+    requested = list(dict.fromkeys(user_ids))
+    valid_ids = [ObjectId(user_id) for user_id in requested if ObjectId.is_valid(user_id)]
+    found = {str(user["_id"]): user for user in await users_repo.find_by_ids(valid_ids)} if valid_ids else {}
     
-    old_user = await users_collection.find_one({"_id": ObjectId(user_id)})
-    if not old_user:
+    users = []
+    for user_id in requested:
+        if user_id in found:
+            user = found[user_id]
+            user.pop("password", None)  # Hapus password
+            users.append(UserResponse(**user))
+    missing_ids = [user_id for user_id in requested if user_id not in found]
+    return users, missing_ids
+
+
+async def update_user(
+    user_id: str,
+    user_data: UserUpdateRequest,
+    expected_version: Optional[int] = None,
+) -> Optional[UserResponse]:
+    """
+    Update user dengan pembersihan foto profil lama.
+    expected_version (dari If-Match) -> 412 jika user sudah diubah oleh request lain.
+    """
+    users_repo = get_user_repository()
+    
+    if not ObjectId.is_valid(user_id):
+        # Lepas referensi foto profil yang sudah diambil saat upload
+        await release_upload(user_data.profile_img)
         return None
     
     update_data = {k: v for k, v in user_data.model_dump(exclude_unset=True).items() if v is not None}
     
-    # Clean image
-    if "profile_img" in update_data and update_data["profile_img"]:
-        old_profile_path = old_user.get("profile_img")
-        
-        if old_profile_path and old_profile_path != update_data["profile_img"]:
-            file_to_delete = Path(old_profile_path)
-            
-            try:
-                if file_to_delete.exists() and file_to_delete.is_file():
-                    os.remove(file_to_delete)
-                    print(f"DEBUG: Foto profil lama berhasil dihapus: {file_to_delete}")
-            except Exception as e:
-                print(f"WARNING: Gagal menghapus file fisik foto profil: {e}")
-
     if not update_data:
         return None
     
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    result = await users_collection.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": update_data}
-    )
-    
-    if result.matched_count == 0:
+    # profile_img hanya ada jika file di-upload (sudah memegang referensi dari save_uploaded_file)
+    new_upload = update_data.get("profile_img")
+    try:
+        result = await users_repo.update_by_id(ObjectId(user_id), update_data, expected_version)
+    except Exception:
+        await release_upload(new_upload)
+        raise
+    end_deadline()
+    user_cache.invalidate(ObjectId(user_id))
+    
+    if result is None:
+        await release_upload(new_upload)
+        # Bedakan user tidak ada (404) dan version tidak cocok (412)
+        if expected_version is not None and await users_repo.find_by_id(ObjectId(user_id)):
+            raise_version_conflict()
         return None
     
-    updated_user = await users_collection.find_one({"_id": ObjectId(user_id)})
+    old_user, updated_user = result
+    
+    # Ganti referensi foto profil; file lama hanya dihapus jika tidak dipakai document lain
+    old_profile_path = old_user.get("profile_img")
+    new_profile_path = updated_user.get("profile_img")
+    if new_profile_path != old_profile_path:
+        await release_upload(old_profile_path)
+    elif new_upload:
+        # File yang sama di-upload ulang: referensi tambahan dari upload dilepas
+        await release_upload(new_upload)
     
-    if updated_user:
-        updated_user.pop("password", None)
-        return UserResponse(**updated_user)
-        
-    return None
+    updated_user.pop("password", None)
+    return UserResponse(**updated_user)
 
 
 async def delete_user(user_id: str) -> bool:
     """Hapus user"""
-    db = get_database()
-    users_collection = db.users
+    users_repo = get_user_repository()
     
     if not ObjectId.is_valid(user_id):
         return False
     
-    result = await users_collection.delete_one({"_id": ObjectId(user_id)})
-    return result.deleted_count > 0
+    deleted_user = await users_repo.delete_by_id(ObjectId(user_id))
+    end_deadline()
+    user_cache.invalidate(ObjectId(user_id))
+    if not deleted_user:
+        return False
+    
+    user_counter.adjust(-1)
+    await release_upload(deleted_user.get("profile_img"))
+    return True
 
 
 async def verify_user_credentials(email: str, password: str) -> Optional[dict]:
@@ -157,9 +219,16 @@ async def verify_user_credentials(email: str, password: str) -> Optional[dict]:
     if not user:
         return None
     
-    if not verify_password(password, user["password"]):
+    with span("bcrypt"):
+        valid, new_hash = await run_in_threadpool(verify_and_update_password, password, user["password"])
+    if not valid:
         return None
 
+    # Rehash transparan jika cost bcrypt di settings berubah (tanpa menaikkan version/ETag milik client)
+    if new_hash:
+        await get_user_repository().update_by_id(user["_id"], {"password": new_hash}, bump_version=False)
+        user_cache.invalidate(user["_id"])
+
     # Limit status user
     if user.get("status") == "inactive":
         raise HTTPException(
@@ -1,18 +1,21 @@
 import os
+import hashlib
 import aiofiles
 from fastapi import UploadFile, HTTPException, status
-from datetime import datetime
 import uuid
+from app.core.request_logging import span
+from app.utils.image_variants import schedule_variants
 
 
 UPLOAD_DIR = "uploads"
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 
 
-async def save_uploaded_file(file: UploadFile, subfolder: str = "") -> str:
+async def read_uploaded_file(file: UploadFile, subfolder: str = "") -> tuple[str, bytes]:
     """
-    Save uploaded file dan return URL relative path
+    Validasi + baca file upload, return (URL relative path, isi file)
     subfolder: 'users' atau 'products'
+    Nama file = sha256 isi file, sehingga file identik hanya disimpan sekali
     """
     # Validasi extension
     file_ext = os.path.splitext(file.filename)[1].lower()
@@ -26,16 +29,27 @@ async def save_uploaded_file(file: UploadFile, subfolder: str = "") -> str:
     upload_path = os.path.join(UPLOAD_DIR, subfolder) if subfolder else UPLOAD_DIR
     os.makedirs(upload_path, exist_ok=True)
     
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
-    filename = f"{timestamp}_{unique_id}{file_ext}"
-    file_path = os.path.join(upload_path, filename)
-    
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as f:
+    with span("file_io"):
         content = await file.read()
-        await f.write(content)
+    
+    # Generate filename dari hash isi file (content-addressed)
+    digest = hashlib.sha256(content).hexdigest()
     
     # Return relative URL path
-    return f"{upload_path}/{filename}"
+    return f"{upload_path}/{digest}{file_ext}", content
+
+
+async def write_uploaded_file(file_path: str, content: bytes) -> None:
+    """
+    Simpan isi file ke file_path (dilewati jika isi yang sama sudah pernah disimpan).
+    Pemanggil harus sudah memegang referensi file (lihat upload_service.save_uploaded_file).
+    """
+    with span("file_io"):
+        if os.path.exists(file_path):
+            return
+        # Tulis ke file sementara lalu rename agar upload paralel tidak menghasilkan file setengah jadi
+        tmp_path = f"{file_path}.{uuid.uuid4().hex[:8]}.tmp"
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            await f.write(content)
+        os.replace(tmp_path, file_path)
+    schedule_variants(file_path)
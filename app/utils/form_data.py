@@ -1,76 +1,99 @@
-from fastapi import Form
-from typing import Optional
+import json
+from copy import deepcopy
+from typing import Optional, Type
+from fastapi import Request, UploadFile
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from starlette.datastructures import UploadFile as StarletteUploadFile
 from app.models.product import ProductCreateRequest, ProductUpdateRequest
 from app.models.user import UserCreateRequest, UserUpdateRequest
 
+# Field yang hanya diisi server dari file upload, tidak boleh dikirim client
+PRODUCT_SERVER_FIELDS = ("image_url",)
+USER_SERVER_FIELDS = ("profile_img",)
 
-def as_form_user_create(
-    name: str = Form(...),
-    email: str = Form(...),
-    phone: Optional[str] = Form(None),
-    password: str = Form(...),
-    status: str = Form("active"),
-) -> UserCreateRequest:
-    return UserCreateRequest(
-        name=name, email=email, phone=phone, password=password, status=status
-    )
-
-
-def as_form_user_update(
-    name: Optional[str] = Form(None),
-    email: Optional[str] = Form(None),
-    phone: Optional[str] = Form(None),
-    status: Optional[str] = Form(None),
-) -> UserUpdateRequest:
-    return UserUpdateRequest(name=name, email=email, phone=phone, status=status)
-
-
-def as_form_product_create(
-    name: str = Form(...),
-    description: str = Form(...),
-    category: str = Form(...),
-    price: float = Form(..., gt=0),
-    stock_available: int = Form(..., ge=0),
-    stock_unit: str = Form(...),
-    stock_warning_threshold: int = Form(..., ge=0),
-    status: str = Form("active"),
-) -> ProductCreateRequest:
-    return ProductCreateRequest(
-        name=name,
-        description=description,
-        category=category,
-        price=price,
-        stock_available=stock_available,
-        stock_unit=stock_unit,
-        stock_warning_threshold=stock_warning_threshold,
-        status=status,
-    )
-
-
-def as_form_product_update(
-    name: Optional[str] = Form(None),
-    description: Optional[str] = Form(None),
-    category: Optional[str] = Form(None),
-    price: Optional[str] = Form(None),
-    stock_available: Optional[str] = Form(None),
-    stock_unit: Optional[str] = Form(None),
-    stock_warning_threshold: Optional[str] = Form(None),
-    status: Optional[str] = Form(None),
-) -> ProductUpdateRequest:
-    def clean(val):
-        if val == "" or val is None:
-            return None
-        return val
-
-    return ProductUpdateRequest(
-        name=clean(name),
-        description=clean(description),
-        category=clean(category),
-        price=float(price) if clean(price) else None,
-        stock_available=int(stock_available) if clean(stock_available) else None,
-        stock_unit=clean(stock_unit),
-        stock_warning_threshold=(
-            int(stock_warning_threshold) if clean(stock_warning_threshold) else None
-        ),
-        status=clean(status),
-    )
+
+def _is_json(request: Request) -> bool:
+    return request.headers.get("content-type", "").startswith("application/json")
+
+
+async def parse_payload(
+    request: Request,
+    model: Type[BaseModel],
+    server_fields: tuple[str, ...] = (),
+) -> BaseModel:
+    """
+    Validasi body request terhadap model, baik application/json maupun multipart/form-data.
+    Field form yang kosong dianggap tidak dikirim (sama seperti Form() sebelumnya).
+    """
+    if _is_json(request):
+        try:
+            data = json.loads(await request.body() or b"null")
+        except json.JSONDecodeError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}}]
+            )
+        if not isinstance(data, dict):
+            raise RequestValidationError(
+                [{"type": "model_attributes_type", "loc": ("body",), "msg": "Input should be an object", "input": data}]
+            )
+    else:
+        form = await request.form()
+        data = {key: value for key, value in form.items() if isinstance(value, str) and value != ""}
+
+    for field in server_fields:
+        data.pop(field, None)
+
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
+
+async def get_form_file(request: Request) -> Optional[UploadFile]:
+    """File upload (field "file") dari body multipart; None untuk body JSON"""
+    if _is_json(request):
+        return None
+    file = (await request.form()).get("file")
+    if isinstance(file, StarletteUploadFile) and file.filename:
+        return file
+    return None
+
+
+async def product_create_payload(request: Request) -> ProductCreateRequest:
+    return await parse_payload(request, ProductCreateRequest, PRODUCT_SERVER_FIELDS)
+
+
+async def product_update_payload(request: Request) -> ProductUpdateRequest:
+    return await parse_payload(request, ProductUpdateRequest, PRODUCT_SERVER_FIELDS)
+
+
+async def user_create_payload(request: Request) -> UserCreateRequest:
+    return await parse_payload(request, UserCreateRequest, USER_SERVER_FIELDS)
+
+
+async def user_update_payload(request: Request) -> UserUpdateRequest:
+    return await parse_payload(request, UserUpdateRequest, USER_SERVER_FIELDS)
+
+
+def payload_openapi(model: Type[BaseModel], server_fields: tuple[str, ...] = (), with_file: bool = True) -> dict:
+    """Dokumentasi OpenAPI untuk body yang menerima JSON maupun multipart (+ file opsional)"""
+    schema = model.model_json_schema()
+    for field in server_fields:
+        schema["properties"].pop(field, None)
+        if field in schema.get("required", []):
+            schema["required"].remove(field)
+
+    form_schema = deepcopy(schema)
+    if with_file:
+        form_schema["properties"]["file"] = {"type": "string", "format": "binary"}
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                "multipart/form-data": {"schema": form_schema},
+            },
+        }
+    }
@@ -1,4 +1,5 @@
 import random
+from fastapi import HTTPException, status
 
 
 def generate_display_info() -> dict:
@@ -13,3 +14,15 @@ def generate_display_info() -> dict:
         "sales_count": random.randint(10, 70),
         "discount_percentage": random.randint(5, 30)
     }
+
+
+def raise_version_conflict() -> None:
+    """Raise 412 saat If-Match version tidak sama dengan version document"""
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource has been modified by another request. Fetch the latest version and retry.",
+    )
+
+
+def etag_for_version(version: int) -> str:
+    return f'"{version}"'
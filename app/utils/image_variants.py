@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from app.core.config import settings
+from app.utils.cache import CoalescingCache
+
+logger = logging.getLogger(__name__)
+
+# Nama variant -> ukuran maksimum (lebar, tinggi); aspect ratio dipertahankan
+VARIANT_SIZES = {
+    "thumb": (200, 200),
+    "medium": (800, 800),
+}
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+# <stem>_<variant>.<ext>, mis. products/3fa9..._thumb.webp
+_VARIANT_PATTERN = re.compile(r"^(?P<stem>.+)_(?P<variant>%s)(?P<ext>\.\w+)$" % "|".join(VARIANT_SIZES))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending: set[asyncio.Task] = set()
+# Request on-demand untuk gambar yang sama hanya memicu satu proses resize
+_on_demand = CoalescingCache(ttl=0)
+# Gambar asli yang gagal di-resize (mis. bukan gambar valid): tidak dicoba ulang
+_failed: OrderedDict[str, None] = OrderedDict()
+_FAILED_MAX_ENTRIES = 10000
+
+
+class VariantRenderError(Exception):
+    """Gambar asli tidak bisa di-decode oleh Pillow (bukan gambar valid / rusak)"""
+
+
+def variant_path(image_path: str, variant: str, webp: bool = False) -> str:
+    """Path variant yang bisa diprediksi dari path gambar asli"""
+    stem, ext = os.path.splitext(image_path)
+    return f"{stem}_{variant}{'.webp' if webp else ext}"
+
+
+def variant_urls(image_path: Optional[str]) -> Optional[dict[str, str]]:
+    """URL semua variant untuk field image_variants pada response"""
+    if not image_path or not settings.image_variants_enabled:
+        return None
+    urls = {variant: variant_path(image_path, variant) for variant in VARIANT_SIZES}
+    if settings.image_variant_webp:
+        urls.update({f"{variant}_webp": variant_path(image_path, variant, webp=True) for variant in VARIANT_SIZES})
+    return urls
+
+
+def all_variant_paths(image_path: str) -> list[str]:
+    """Semua kemungkinan path variant (untuk pembersihan saat gambar asli dihapus)"""
+    return [variant_path(image_path, variant, webp) for variant in VARIANT_SIZES for webp in (False, True)]
+
+
+def render_variants(source_path: str, webp: bool) -> list[str]:
+    """Resize gambar asli ke semua variant. Dijalankan di process pool (CPU-bound)."""
+    from PIL import Image, ImageOps
+
+    written = []
+    try:
+        original = Image.open(source_path)
+    except FileNotFoundError:
+        raise
+    except (OSError, Image.DecompressionBombError) as e:
+        raise VariantRenderError(f"{type(e).__name__}: {e}") from None
+
+    with original:
+        try:
+            # Ambil frame pertama (gif animasi) dan terapkan orientasi EXIF
+            original.seek(0)
+            image = ImageOps.exif_transpose(original)
+            image.load()
+        except (OSError, SyntaxError, ValueError, EOFError, Image.DecompressionBombError) as e:
+            # Hanya kegagalan decode yang dianggap permanen; error saat menyimpan variant tidak
+            raise VariantRenderError(f"{type(e).__name__}: {e}") from None
+
+        ext = os.path.splitext(source_path)[1].lower()
+
+        for variant, size in VARIANT_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail(size)
+
+            target = variant_path(source_path, variant)
+            if ext in (".jpg", ".jpeg") and resized.mode not in ("RGB", "L"):
+                resized = resized.convert("RGB")
+            _atomic_save(resized, target, quality=85, optimize=True)
+            written.append(target)
+
+            if webp and ext != ".webp":
+                target = variant_path(source_path, variant, webp=True)
+                _atomic_save(resized, target, format="WEBP", quality=80)
+                written.append(target)
+    return written
+
+
+def _atomic_save(image, target: str, **options) -> None:
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    image.save(tmp_path, format=options.pop("format", image.format or _format_for(target)), **options)
+    os.replace(tmp_path, target)
+
+
+def _format_for(path: str) -> str:
+    from PIL import Image
+
+    return Image.registered_extensions()[os.path.splitext(path)[1].lower()]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.image_variant_workers)
+    return _pool
+
+
+async def generate_variants(source_path: str) -> list[str]:
+    """Generate variant di process pool dan tunggu hasilnya (kegagalan dicatat agar tidak diulang)"""
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        return await loop.run_in_executor(pool, render_variants, source_path, settings.image_variant_webp)
+    except VariantRenderError:
+        _failed[os.path.abspath(source_path)] = None
+        while len(_failed) > _FAILED_MAX_ENTRIES:
+            _failed.popitem(last=False)
+        raise
+    except BrokenProcessPool:
+        # Worker mati (mis. OOM): pool diganti saat pemanggilan berikutnya, gambar tidak ditandai gagal
+        _reset_pool(pool)
+        raise
+
+
+def variant_failed(source_path: str) -> bool:
+    return os.path.abspath(source_path) in _failed
+
+
+def schedule_variants(source_path: str) -> None:
+    """Generate variant di background setelah upload, tanpa menahan request"""
+    if not settings.image_variants_enabled:
+        return
+
+    async def run():
+        try:
+            await generate_variants(source_path)
+        except Exception as e:
+            logger.warning("Gagal membuat variant gambar %s: %s", source_path, e)
+
+    task = asyncio.create_task(run())
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    if _pool is broken:
+        _pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_variant_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class VariantStaticFiles(StaticFiles):
+    """
+    StaticFiles untuk folder uploads yang membuat variant secara on-demand:
+    jika <stem>_<variant>.<ext> belum ada tetapi gambar aslinya ada (mis. upload lama),
+    variant di-generate, disimpan, lalu dikirim.
+    """
+
+    async def get_response(self, path: str, scope: Scope):
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            if exc.status_code != 404 or not settings.image_variants_enabled:
+                raise
+            source = self._find_source(path)
+            if source is None or variant_failed(source):
+                raise
+            try:
+                await _on_demand.get(source, lambda: generate_variants(source))
+            except Exception as e:
+                logger.warning("Gagal membuat variant gambar %s: %s", source, e)
+                raise exc
+            return await super().get_response(path, scope)
+
+    def _find_source(self, path: str) -> Optional[str]:
+        match = _VARIANT_PATTERN.match(path)
+        if match is None:
+            return None
+        if match["ext"] == ".webp" and not settings.image_variant_webp:
+            return None
+
+        # Variant webp bisa berasal dari ekstensi asli apa pun
+        candidates = SOURCE_EXTENSIONS if match["ext"] == ".webp" else (match["ext"],)
+        for ext in candidates:
+            full_path, stat_result = self.lookup_path(match["stem"] + ext)
+            if stat_result is not None:
+                return full_path
+        return None
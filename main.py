@@ -1,21 +1,35 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.deadline import DeadlineMiddleware, DeadlineExceeded
+from app.core.request_logging import RequestLoggingMiddleware, setup_logging
+from app.core.profiling import ProfilingMiddleware
 from app.db.connection import connect_to_mongo, close_mongo_connection
-from app.api import auth, users, products
+from app.api import auth, users, products, metrics
+from app.utils.image_variants import VariantStaticFiles, shutdown_variant_pool
+from pymongo.errors import ExecutionTimeout
 import os
 import uvicorn
 
 
+# Logging JSON non-blocking (queue + thread listener)
+log_listener = setup_logging(settings.log_level)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle events untuk startup dan shutdown"""
-    # Startup: Connect to MongoDB
-    await connect_to_mongo()
+    # Startup: Connect to MongoDB (tidak diperlukan untuk storage in-memory)
+    if settings.storage_backend == "mongo":
+        await connect_to_mongo()
     yield
     # Shutdown: Close MongoDB connection
     await close_mongo_connection()
+    shutdown_variant_pool()
+    log_listener.stop()
 
 
 # Inisialisasi FastAPI app
@@ -35,16 +49,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression Middleware
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    compresslevel=settings.compression_level,
+    offload_size=settings.compression_offload_size,
+)
+
+# Deadline Middleware (di luar compression & route agar budget mencakup seluruh pemrosesan request)
+app.add_middleware(
+    DeadlineMiddleware,
+    default_timeout_ms=settings.request_timeout_ms,
+    route_timeouts_ms=settings.route_timeouts_ms,
+)
+
+# Profiling Middleware (opt-in, tepat di dalam request logging agar profile memakai request ID)
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.profiling_dir,
+        token=settings.profiling_token,
+        sample_rate=settings.profiling_sample_rate,
+        max_files=settings.profiling_max_files,
+        interval_ms=settings.profiling_interval_ms,
+    )
+
+# Request Logging Middleware (paling luar: request ID + durasi total + span)
+app.add_middleware(RequestLoggingMiddleware)
+
+
+@app.exception_handler(DeadlineExceeded)
+@app.exception_handler(ExecutionTimeout)
+async def service_unavailable_handler(request: Request, exc: Exception):
+    """Request yang melewati deadline atau ditolak karena overload -> 503"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 # Mounting static files
 if not os.path.exists("uploads"):
     os.makedirs("uploads")
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Variant gambar (<nama>_thumb.<ext>, <nama>_medium.webp, ...) di-generate on-demand jika belum ada
+app.mount("/uploads", VariantStaticFiles(directory="uploads"), name="uploads")
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(users.router, prefix="/api/v1")
 app.include_router(products.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
 
 
 @app.get("/")
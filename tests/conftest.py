@@ -0,0 +1,21 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+
+# Settings wajib diisi sebelum modul app di-import; test tidak membutuhkan MongoDB sungguhan
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017/test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Satu client untuk semua test: lifespan (log listener, process pool) hanya start/stop sekali
+    from main import app
+    from app.api.dependencies import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {"_id": "test"}
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
@@ -0,0 +1,18 @@
+import asyncio
+from app.utils.cache import CoalescingCache
+
+
+def test_hit_keeps_hot_key_on_eviction():
+    cache = CoalescingCache(ttl=60, max_entries=2)
+
+    async def load(key):
+        return key
+
+    async def run():
+        await cache.get("hot", lambda: load("hot"))
+        await cache.get("cold", lambda: load("cold"))
+        await cache.get("hot", lambda: load("hot"))
+        await cache.get("new", lambda: load("new"))
+
+    asyncio.run(run())
+    assert list(cache._entries) == ["hot", "new"]
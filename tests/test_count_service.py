@@ -0,0 +1,52 @@
+import asyncio
+import time
+from app.core.deadline import _deadline, remaining_ms
+from app.services.count_service import CollectionCounter
+
+
+class CountingRepo:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+        self.deadlines = []
+
+    async def count(self, filter):
+        self.calls += 1
+        self.deadlines.append(remaining_ms())
+        if self.fail:
+            raise RuntimeError("count gagal")
+        return 7
+
+
+def test_background_reconcile_runs_without_request_deadline():
+    counter = CollectionCounter(reconcile_seconds=0)
+    repo = CountingRepo()
+
+    async def run():
+        assert await counter.get_total(repo, {}, "cached") == 7
+        token = _deadline.set(time.monotonic() + 0.05)
+        try:
+            await counter.get_total(repo, {}, "cached")
+        finally:
+            _deadline.reset(token)
+        await counter._reconcile_task
+
+    asyncio.run(run())
+    assert repo.deadlines[-1] is None
+
+
+def test_background_reconcile_failure_is_backed_off():
+    counter = CollectionCounter(reconcile_seconds=60)
+    repo = CountingRepo()
+
+    async def run():
+        await counter.get_total(repo, {}, "cached")
+        repo.fail = True
+        counter._reconciled_at -= 61
+        for _ in range(3):
+            assert await counter.get_total(repo, {}, "cached") == 7
+            await asyncio.sleep(0)
+        await counter._reconcile_task
+
+    asyncio.run(run())
+    assert repo.calls == 2
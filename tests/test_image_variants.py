@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+from app.core.config import settings
+from app.utils import image_variants
+from app.utils.image_variants import VariantStaticFiles, variant_urls
+
+
+def test_broken_source_returns_404_and_is_not_rerendered(tmp_path, monkeypatch):
+    # File berekstensi .png tetapi isinya bukan gambar
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    pool_calls = []
+    get_pool = image_variants._get_pool
+    monkeypatch.setattr(image_variants, "_get_pool", lambda: pool_calls.append(1) or get_pool())
+
+    app = Starlette(routes=[Mount("/uploads", VariantStaticFiles(directory=tmp_path))])
+    with TestClient(app) as client:
+        assert client.get("/uploads/broken_thumb.png").status_code == 404
+        assert client.get("/uploads/broken_medium.webp").status_code == 404
+    assert len(pool_calls) == 1
+
+
+def test_variant_urls_hidden_when_disabled(monkeypatch):
+    assert variant_urls("uploads/products/a.png")["thumb"] == "uploads/products/a_thumb.png"
+    monkeypatch.setattr(settings, "image_variants_enabled", False)
+    assert variant_urls("uploads/products/a.png") is None
+
+
+def test_broken_pool_is_replaced_and_source_not_marked_failed(tmp_path, monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    source = tmp_path / "ok.png"
+    source.write_bytes(b"ok")
+
+    class BrokenPool:
+        def submit(self, *args, **kwargs):
+            raise BrokenProcessPool("worker mati")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    broken = BrokenPool()
+    monkeypatch.setattr(image_variants, "_pool", broken)
+
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(image_variants.generate_variants(str(source)))
+
+    assert image_variants._pool is None
+    assert not image_variants.variant_failed(str(source))
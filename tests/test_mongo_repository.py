@@ -0,0 +1,128 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from bson import ObjectId
+from app.core.deadline import DeadlineExceeded, _deadline, remaining_ms
+from app.core.request_logging import RequestContext, _request_context
+from app.db import mongo_repository
+from app.db.connection import pool_admission
+from app.db.mongo_repository import MongoRepository, _operation
+
+
+class StubCollection:
+    """Pengganti collection Motor: menyimpan document di dict"""
+
+    def __init__(self):
+        self.docs: dict = {}
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = dict(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def find_one(self, filter, **kwargs):
+        doc = self.docs.get(filter["_id"])
+        return dict(doc) if doc else None
+
+    async def find_one_and_update(self, filter, update, return_document=None, **kwargs):
+        doc = self.docs.get(filter["_id"])
+        if doc is None or ("version" in filter and doc.get("version") != filter["version"]):
+            return None
+        before = dict(doc)
+        doc.update(update.get("$set", {}))
+        for field, delta in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + delta
+        return before
+
+
+def _stub_database(monkeypatch) -> StubCollection:
+    collection = StubCollection()
+    monkeypatch.setattr(mongo_repository, "get_database", lambda: {"products": collection})
+    return collection
+
+
+def test_operation_uses_pool_admission_and_mongo_span():
+    async def run():
+        ctx = RequestContext("test")
+        token = _request_context.set(ctx)
+        admitted = pool_admission.admitted
+        try:
+            async with _operation():
+                assert pool_admission.inflight >= 1
+        finally:
+            _request_context.reset(token)
+        return ctx, pool_admission.admitted - admitted
+
+    ctx, admitted = asyncio.run(run())
+    assert admitted == 1
+    assert ctx.spans["mongo"][1] == 1
+
+
+def test_repository_roundtrip_through_stub_collection(monkeypatch):
+    _stub_database(monkeypatch)
+    repo = MongoRepository("products")
+
+    async def run():
+        doc_id = await repo.insert_one({"name": "a", "version": 1})
+        found = await repo.find_by_id(doc_id)
+        result = await repo.update_by_id(doc_id, {"name": "b"}, expected_version=1)
+        conflict = await repo.update_by_id(doc_id, {"name": "c"}, expected_version=1)
+        return found, result, conflict
+
+    found, (before, after), conflict = asyncio.run(run())
+    assert found["name"] == "a"
+    assert before["version"] == 1
+    assert after == {**before, "name": "b", "version": 2}
+    assert conflict is None
+
+
+def test_repository_write_keeps_request_deadline(monkeypatch):
+    _stub_database(monkeypatch)
+    repo = MongoRepository("products")
+
+    async def run():
+        token = _deadline.set(time.monotonic() + 60)
+        try:
+            # Mis. upsert refcount upload sebelum write utama: deadline tetap berlaku
+            await repo.insert_one({"name": "a", "version": 1})
+            return remaining_ms()
+        finally:
+            _deadline.reset(token)
+
+    assert asyncio.run(run()) is not None
+
+
+def test_deadline_released_after_main_write(monkeypatch):
+    from app.services import product_service
+    from app.models.product import ProductCreateRequest
+
+    async def run():
+        token = _deadline.set(time.monotonic() + 60)
+        try:
+            await product_service.create_product(ProductCreateRequest(
+                name="a", description="b", category="c", price=1,
+                stock_available=1, stock_unit="pcs", stock_warning_threshold=0,
+            ))
+            # Statistik / refcount setelah insert berjalan tanpa deadline
+            return remaining_ms()
+        finally:
+            _deadline.reset(token)
+
+    assert asyncio.run(run()) is None
+
+
+def test_expired_deadline_sheds_before_write(monkeypatch):
+    collection = _stub_database(monkeypatch)
+    repo = MongoRepository("products")
+
+    async def run():
+        token = _deadline.set(time.monotonic() - 1)
+        try:
+            await repo.insert_one({"name": "a"})
+        finally:
+            _deadline.reset(token)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert collection.docs == {}
@@ -0,0 +1,35 @@
+from app.core.rate_limit import TokenBucketLimiter
+
+
+def test_key_flood_does_not_reset_exhausted_bucket():
+    limiter = TokenBucketLimiter(capacity=2, refill_per_minute=1, max_keys=10)
+    assert limiter.consume("victim")[0]
+    assert limiter.consume("victim")[0]
+    assert not limiter.consume("victim")[0]
+
+    for i in range(100):
+        limiter.consume(f"spray-{i}")
+
+    assert not limiter.consume("victim")[0]
+    assert len(limiter._buckets) <= 10
+
+
+def test_full_table_still_serves_new_keys():
+    limiter = TokenBucketLimiter(capacity=20, refill_per_minute=10, max_keys=1000)
+    for i in range(1000):
+        limiter.consume(f"spray-{i}")
+
+    assert limiter.consume("new-client")[0]
+    assert len(limiter._buckets) == 1000
+
+
+def test_refilled_buckets_are_evicted_first():
+    limiter = TokenBucketLimiter(capacity=1, refill_per_minute=60, max_keys=2)
+    limiter.consume("a")
+    limiter.consume("b")
+    # Geser waktu: bucket a & b sudah terisi penuh kembali
+    limiter._buckets = type(limiter._buckets)((key, (tokens, last - 5)) for key, (tokens, last) in limiter._buckets.items())
+
+    assert limiter.consume("c")[0]
+    assert "a" not in limiter._buckets
+    assert limiter.evicted == 1
@@ -0,0 +1,30 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+from app.core.request_logging import JsonFormatter, _StructuredQueueHandler
+
+
+def test_exception_logged_as_separate_field():
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream = io.StringIO()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+
+    logger = logging.getLogger("test.request_logging")
+    logger.propagate = False
+    logger.addHandler(_StructuredQueueHandler(log_queue))
+    listener.start()
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("gagal %s", "proses")
+    finally:
+        listener.stop()
+
+    entry = json.loads(stream.getvalue())
+    assert entry["msg"] == "gagal proses"
+    assert "ValueError: boom" in entry["exc"]
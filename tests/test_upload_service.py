@@ -0,0 +1,93 @@
+import asyncio
+import os
+import pytest
+from bson import ObjectId
+from app.db.repository import get_file_ref_repository
+from app.services import upload_service
+from app.utils import file_upload
+
+PRODUCT = {
+    "name": "Teh",
+    "description": "Melati",
+    "category": "minuman",
+    "price": 5,
+    "stock_available": 10,
+    "stock_unit": "pack",
+    "stock_warning_threshold": 1,
+}
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    # Folder uploads terpisah per test; variant tidak dibuat (process pool tidak ikut chdir)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(file_upload, "schedule_variants", lambda path: None)
+    return tmp_path
+
+
+def _refs(path: str):
+    return get_file_ref_repository()._refs.get(path)
+
+
+def test_failed_update_releases_uploaded_file(client, upload_dir):
+    missing_id = str(ObjectId())
+    response = client.post(f"/api/v1/products/{missing_id}/image", files={"file": ("a.png", b"orphan", "image/png")})
+    assert response.status_code == 404
+    assert os.listdir(upload_dir / "uploads" / "products") == []
+
+
+def test_version_conflict_releases_uploaded_file(client, upload_dir):
+    product_id = client.post("/api/v1/products", json=PRODUCT).json()["_id"]
+    response = client.post(
+        f"/api/v1/products/{product_id}/image",
+        files={"file": ("a.png", b"conflict", "image/png")},
+        headers={"If-Match": '"99"'},
+    )
+    assert response.status_code == 412
+    assert os.listdir(upload_dir / "uploads" / "products") == []
+
+
+def test_reuploading_same_file_keeps_single_reference(client, upload_dir):
+    product_id = client.post("/api/v1/products", json=PRODUCT).json()["_id"]
+    for _ in range(2):
+        response = client.post(f"/api/v1/products/{product_id}/image", files={"file": ("a.png", b"same", "image/png")})
+        assert response.status_code == 200
+
+    image_url = response.json()["image_url"]
+    assert _refs(image_url) == 1
+
+    client.delete(f"/api/v1/products/{product_id}")
+    assert not os.path.exists(image_url)
+
+
+def test_release_restores_file_reacquired_concurrently(upload_dir, monkeypatch):
+    file_refs = get_file_ref_repository()
+    path = "uploads/products/race.png"
+    os.makedirs("uploads/products")
+    open(path, "wb").write(b"race")
+
+    async def run():
+        await upload_service.acquire_upload(path)
+        delete_if_unreferenced = file_refs.delete_if_unreferenced
+
+        async def reacquire_then_delete(target):
+            # Upload lain mengambil referensi di antara decrement dan hapus catatan
+            await upload_service.acquire_upload(target)
+            return await delete_if_unreferenced(target)
+
+        monkeypatch.setattr(file_refs, "delete_if_unreferenced", reacquire_then_delete)
+        await upload_service.release_upload(path)
+
+    asyncio.run(run())
+    assert open(path, "rb").read() == b"race"
+    assert _refs(path) == 1
+
+
+def test_invalid_id_releases_uploaded_file(client, upload_dir):
+    response = client.post("/api/v1/products/not-an-id/image", files={"file": ("a.png", b"invalid-id", "image/png")})
+    assert response.status_code == 404
+    response = client.put("/api/v1/users/bad", files={"file": ("a.png", b"invalid-user", "image/png")})
+    assert response.status_code == 404
+
+    assert os.listdir(upload_dir / "uploads" / "products") == []
+    assert os.listdir(upload_dir / "uploads" / "users") == []
@@ -0,0 +1,16 @@
+from app.services import user_service
+
+
+def test_login_rehash_keeps_version_and_etag(client, monkeypatch):
+    user = {"name": "Rehash", "email": "rehash@example.com", "password": "secret123"}
+    user_id = client.post("/api/v1/users", json=user).json()["_id"]
+    etag = client.get(f"/api/v1/users/{user_id}").headers["etag"]
+
+    # Simulasikan cost bcrypt yang berubah: verifikasi sukses + hash baru
+    monkeypatch.setattr(user_service, "verify_and_update_password", lambda password, hashed: (True, "rehashed"))
+    login = client.post("/api/v1/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert login.status_code == 200
+
+    response = client.put(f"/api/v1/users/{user_id}", json={"name": "Baru"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
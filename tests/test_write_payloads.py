@@ -0,0 +1,33 @@
+PRODUCT = {
+    "name": "Kopi",
+    "description": "Arabika",
+    "category": "minuman",
+    "price": 10,
+    "stock_available": 3,
+    "stock_unit": "pack",
+    "stock_warning_threshold": 1,
+}
+
+
+def test_json_update_ignores_null_fields(client):
+    product_id = client.post("/api/v1/products", json=PRODUCT).json()["_id"]
+
+    response = client.put(f"/api/v1/products/{product_id}", json={"name": None, "category": None, "price": 20})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Kopi"
+    assert response.json()["category"] == "minuman"
+    assert response.json()["price"] == 20
+
+    assert client.get(f"/api/v1/products/{product_id}").status_code == 200
+
+
+def test_multipart_create_treats_empty_fields_as_missing(client):
+    user = {"name": "Form", "email": "form@example.com", "password": "secret123", "status": "", "phone": ""}
+    response = client.post("/api/v1/users", data=user, files={"file": ("", b"")})
+    assert response.status_code == 201
+    assert response.json()["status"] == "active"
+    assert response.json()["phone"] is None
+
+    product = {key: str(value) for key, value in PRODUCT.items()}
+    response = client.post("/api/v1/products", data={**product, "description": ""}, files={"file": ("", b"")})
+    assert response.status_code == 422